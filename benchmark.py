@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""Benchmark parsovania a vykresľovania weather_display
+
+Použitie:
+    python benchmark.py [--output results.json] [--compare baseline.json]
+    xvfb-run python benchmark.py        # Tk časti na stroji bez displeja
+    python benchmark.py --record        # obnoví fixtures z Open-Meteo
+
+Odpovede Open-Meteo sa berú z fixtures/ a servíruje ich lokálny stub server,
+takže výsledky nezávisia od siete a dajú sa porovnávať medzi commitmi.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Vlastný HOME - benchmark nesmie čítať ani prepisovať cache a polohu displeja
+BENCH_HOME = tempfile.mkdtemp(prefix='weather-bench-')
+atexit.register(shutil.rmtree, BENCH_HOME, True)
+os.environ['HOME'] = BENCH_HOME
+
+import weather_display as wd  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+FIXTURE_HOURS = (24, 168, 384)
+
+# Poloha pre --record a odpoveď stubu na geolokáciu
+BENCH_LOCATION = (48.9333, 21.9000, "Humenné", "SK")
+
+
+def fixture_path(hours):
+    return os.path.join(FIXTURES_DIR, f"forecast_{hours}h.json")
+
+
+def load_fixtures():
+    fixtures = {}
+    for hours in FIXTURE_HOURS:
+        with open(fixture_path(hours), 'r', encoding='utf-8') as f:
+            fixtures[hours] = json.load(f)
+    return fixtures
+
+
+def record_fixtures():
+    """Stiahne nové fixtures z Open-Meteo s parametrami, aké posiela aplikácia"""
+    http = wd.HttpClient()
+    params = wd.build_forecast_params(list(wd.PAGE_DATA_NEEDS))
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    try:
+        for hours in FIXTURE_HOURS:
+            data = wd.fetch_forecast(
+                http, dict(params, forecast_hours=hours),
+                [BENCH_LOCATION[:2]])[0]
+            with open(fixture_path(hours), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            print(f"Wrote {fixture_path(hours)}")
+    finally:
+        http.close()
+
+
+def start_stub_server(fixtures):
+    """Lokálny server na mieste Open-Meteo, geocodingu aj ip-api"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == '/v1/forecast':
+                requested = int(query.get('forecast_hours', [168])[0])
+                hours = min((h for h in FIXTURE_HOURS if h >= requested),
+                            default=FIXTURE_HOURS[-1])
+                count = len(query.get('latitude', [''])[0].split(','))
+                body = fixtures[hours] if count == 1 else [fixtures[hours]] * count
+            elif url.path == '/v1/search':
+                body = {'results': []}
+            else:
+                latitude, longitude, city, country = BENCH_LOCATION
+                body = {'status': 'success', 'lat': latitude,
+                        'lon': longitude, 'city': city, 'countryCode': country}
+
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    for name, (url, timeout) in list(wd.ENDPOINTS.items()):
+        wd.ENDPOINTS[name] = (base + urlparse(url).path, timeout)
+    # Fixtures sú JSON, flatbuffers by stub nevedel
+    wd.HAS_OPENMETEO_SDK = False
+    return server
+
+
+def measure(func, number, repeat):
+    """Čas jedného volania v ms - min, medián a p95 z repeat opakovaní"""
+    func()  # zahriatie
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number * 1000)
+    samples.sort()
+    return {
+        'unit': 'ms',
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def bench_parse(fixtures, results, repeat):
+    for hours, data in fixtures.items():
+        results[f"parse/from_api_{hours}h"] = measure(
+            lambda: wd.WeatherSnapshot.from_api(data), 20, repeat)
+
+
+def bench_get_weather(results, repeat):
+    """get_weather cez stub server - request, dekódovanie aj parsovanie"""
+    http = wd.HttpClient(retries=0)
+    # get_weather_batch potrebuje z aplikácie len http a forecast_params
+    client = types.SimpleNamespace(http=http)
+    coordinates = [BENCH_LOCATION[:2]]
+    try:
+        for hours in FIXTURE_HOURS:
+            client.forecast_params = dict(
+                wd.build_forecast_params(list(wd.PAGE_DATA_NEEDS)),
+                forecast_hours=hours)
+            if not wd.WeatherApp.get_weather_batch(client, coordinates):
+                raise SystemExit("Stub server request failed")
+            results[f"get_weather/stub_{hours}h"] = measure(
+                lambda: wd.WeatherApp.get_weather_batch(client, coordinates),
+                5, repeat)
+    finally:
+        http.close()
+
+
+def pump(root, until, timeout=10):
+    end = time.monotonic() + timeout
+    while not until():
+        if time.monotonic() > end:
+            raise SystemExit("Timed out waiting for the app")
+        root.update()
+        time.sleep(0.01)
+
+
+def bench_tk(fixtures, results, repeat, search_cycles):
+    """Aktualizácie widgetov a kreslenie grafu v skutočnom Tk (aj pod Xvfb)"""
+    try:
+        root = wd.tk.Tk()
+    except wd.tk.TclError as e:
+        print(f"Skipping Tk benchmarks ({e}); run under xvfb-run")
+        return
+
+    app = wd.WeatherApp(root)
+    try:
+        app.stop_auto_rotate()
+        pump(root, lambda: app.weather_data is not None)
+
+        # Dve rôzne predpovede, aby set_text vždy menil text
+        first = wd.WeatherSnapshot.from_api(fixtures[168])
+        changed = json.loads(json.dumps(fixtures[168]))
+        changed['current']['temperature_2m'] += 1.5
+        changed['daily']['temperature_2m_max'][0] += 1.5
+        second = wd.WeatherSnapshot.from_api(changed)
+        snapshots = [first, second]
+
+        def alternate(update, *args):
+            def run():
+                snapshots.reverse()
+                update(snapshots[0], *args)
+                root.update_idletasks()
+            return run
+
+        app.show_page(0)
+        root.update()
+        view = app.primary_view
+        results['tk/update_current_weather'] = measure(
+            alternate(app.update_current_weather, view), 20, repeat)
+        results['tk/update_forecast'] = measure(
+            alternate(app.update_forecast, view), 20, repeat)
+
+        app.show_page(app.page_names.index('trends'))
+        root.update()
+        results['tk/update_graphs'] = measure(
+            alternate(app.update_graphs), 20, repeat)
+
+        graph = app.temp_graph
+        for hours in FIXTURE_HOURS:
+            snapshot = wd.WeatherSnapshot.from_api(fixtures[hours])
+            series = snapshot.hourly.temperature
+            low, high = wd.series_bounds(series)
+
+            def draw():
+                graph.set_data(series, low - 2, high + 2)
+                root.update_idletasks()
+            results[f"tk/draw_graph_{hours}"] = measure(draw, 20, repeat)
+
+        bench_search_memory(app, root, results, search_cycles)
+    finally:
+        app.fetch_worker.shutdown()
+        app.http.close()
+        root.destroy()
+
+
+def bench_search_memory(app, root, results, cycles):
+    """Rast pamäte pri opakovanom otvorení a zatvorení vyhľadávania"""
+    def cycle():
+        app.manual_location_search()
+        root.update()
+        app.close_search()
+        root.update()
+
+    cycle()
+    widgets_before = wd.count_widgets(root)
+    rss_before = wd.resident_memory()
+    tracemalloc.start()
+    traced_before = tracemalloc.get_traced_memory()[0]
+    for _ in range(cycles):
+        cycle()
+    traced_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    app.stop_auto_rotate()
+
+    results['memory/search_cycles_python'] = {
+        'unit': 'bytes', 'value': traced_after - traced_before,
+        'cycles': cycles}
+    results['memory/search_cycles_widgets'] = {
+        'unit': 'widgets', 'value': wd.count_widgets(root) - widgets_before,
+        'cycles': cycles}
+    if rss_before is not None:
+        results['memory/search_cycles_rss'] = {
+            'unit': 'bytes', 'value': wd.resident_memory() - rss_before,
+            'cycles': cycles}
+
+
+def print_results(results):
+    for name, result in results.items():
+        if result['unit'] == 'ms':
+            print(f"{name:<32} median {result['median']:9.3f} ms"
+                  f"  min {result['min']:9.3f}  p95 {result['p95']:9.3f}")
+        else:
+            print(f"{name:<32} {result['value']:>+12} {result['unit']}"
+                  f" after {result['cycles']} cycles")
+
+
+def compare(results, baseline_path, threshold):
+    """Porovná mediány s iným behom, vráti počet regresií nad threshold"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path}:")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None or result['unit'] != 'ms':
+            continue
+        ratio = result['median'] / old['median'] if old['median'] else 1.0
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<32} {old['median']:9.3f} -> {result['median']:9.3f} ms"
+              f"  ({(ratio - 1) * 100:+.1f}%){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="weather_display benchmarks")
+    parser.add_argument('--output', metavar='PATH',
+                        help="write results as JSON")
+    parser.add_argument('--compare', metavar='PATH',
+                        help="compare medians with an earlier --output file")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="relative slowdown reported as a regression")
+    parser.add_argument('--repeat', type=int, default=15,
+                        help="timing repetitions per benchmark")
+    parser.add_argument('--search-cycles', type=int, default=100,
+                        help="search page open/close cycles for memory")
+    parser.add_argument('--no-tk', action='store_true',
+                        help="skip the benchmarks that need a display")
+    parser.add_argument('--record', action='store_true',
+                        help="refresh fixtures from the live Open-Meteo API")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixtures()
+        return
+
+    # NumPy sa v aplikácii načíta po prvom vykreslení, tu hneď
+    wd.load_numpy()
+    fixtures = load_fixtures()
+    server = start_stub_server(fixtures)
+
+    results = {}
+    try:
+        bench_parse(fixtures, results, args.repeat)
+        bench_get_weather(results, args.repeat)
+        if not args.no_tk:
+            bench_tk(fixtures, results, args.repeat, args.search_cycles)
+    finally:
+        server.shutdown()
+
+    print_results(results)
+
+    if args.output:
+        report = {
+            'meta': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'platform': platform.platform(),
+                'numpy': wd.np is not None,
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Vyrobí gazetteer.tsv z GeoNames dumpu (napr. cities15000.txt)
+
+Použitie:
+    python build_gazetteer.py cities15000.txt [min_population]
+        [--alternate-names alternateNamesV2.txt] [--country-info countryInfo.txt]
+        [--languages en]
+
+Alternatívne názvy (Wien, Praha, Köln, Bombay...) sa berú z alternateNames
+dumpu - len v jazykoch z --languages a v miestnych jazykoch krajiny
+z countryInfo.txt, bez historických a hovorových a len také, ktoré sa dajú
+napísať na klávesnici displeja (latinka). Bez --alternate-names zostane
+ako alternatívny názov len ASCII podoba mena.
+
+Priložený gazetteer.tsv je ručne vybraný zoznam miest; skript slúži na jeho
+vygenerovanie nanovo alebo rozšírenie.
+"""
+import argparse
+import unicodedata
+
+# Stĺpce v GeoNames "cities" súboroch
+GEONAME_ID, NAME, ASCIINAME = 0, 1, 2
+LATITUDE, LONGITUDE, COUNTRY, POPULATION = 4, 5, 8, 14
+
+# Stĺpce v alternateNames(V2).txt
+ALT_GEONAME_ID, ALT_LANGUAGE, ALT_NAME = 1, 2, 3
+ALT_COLLOQUIAL, ALT_HISTORIC = 6, 7
+
+# Stĺpce v countryInfo.txt
+COUNTRY_ISO, COUNTRY_LANGUAGES = 0, 15
+
+
+def typeable(name):
+    """Dá sa názov napísať na klávesnici displeja (po odstránení diakritiky)?"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    plain = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return plain.isascii() and any(c.isalpha() for c in plain)
+
+
+def load_country_languages(path):
+    """ISO kód krajiny -> miestne jazyky (de-AT -> de)"""
+    languages = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) <= COUNTRY_LANGUAGES:
+                continue
+            languages[fields[COUNTRY_ISO]] = {
+                code.split('-')[0] for code in fields[COUNTRY_LANGUAGES].split(',')
+                if code}
+    return languages
+
+
+def load_alternate_names(path, cities, languages, country_languages):
+    """geonameid -> alternatívne názvy vo vybraných jazykoch"""
+    names = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            city = cities.get(fields[ALT_GEONAME_ID])
+            if city is None:
+                continue
+            if fields[ALT_COLLOQUIAL] == '1' or fields[ALT_HISTORIC] == '1':
+                continue
+            language = fields[ALT_LANGUAGE]
+            if language not in languages and \
+                    language not in country_languages.get(city[COUNTRY], ()):
+                continue
+            if typeable(fields[ALT_NAME]):
+                names.setdefault(fields[ALT_GEONAME_ID], []).append(
+                    fields[ALT_NAME])
+    return names
+
+
+def convert(src_path, dst_path='gazetteer.tsv', min_population=15000,
+            alternate_names_path=None, country_info_path=None,
+            languages=('en',)):
+    cities = {}
+    with open(src_path, 'r', encoding='utf-8') as src:
+        for line in src:
+            fields = line.rstrip('\n').split('\t')
+            if int(fields[POPULATION] or 0) >= min_population:
+                cities[fields[GEONAME_ID]] = fields
+
+    alternates = {}
+    if alternate_names_path:
+        country_languages = {}
+        if country_info_path:
+            country_languages = load_country_languages(country_info_path)
+        alternates = load_alternate_names(
+            alternate_names_path, cities, set(languages), country_languages)
+
+    rows = []
+    for geoname_id, fields in cities.items():
+        name = fields[NAME]
+        alt_names = []
+        for alt in alternates.get(geoname_id, []) + [fields[ASCIINAME]]:
+            if alt != name and alt not in alt_names and ',' not in alt:
+                alt_names.append(alt)
+        rows.append((name, ','.join(alt_names), fields[COUNTRY],
+                     f"{float(fields[LATITUDE]):.4f}",
+                     f"{float(fields[LONGITUDE]):.4f}",
+                     str(int(fields[POPULATION] or 0))))
+
+    rows.sort(key=lambda r: (r[0].lower(), -int(r[5])))
+    with open(dst_path, 'w', encoding='utf-8') as dst:
+        dst.write("# name\talt_names\tcountry\tlat\tlon\tpopulation\n")
+        for row in rows:
+            dst.write('\t'.join(row) + '\n')
+    print(f"Wrote {len(rows)} cities to {dst_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="build gazetteer.tsv from a GeoNames cities dump")
+    parser.add_argument('cities', help="GeoNames cities file, e.g. cities15000.txt")
+    parser.add_argument('min_population', nargs='?', type=int, default=15000)
+    parser.add_argument('--output', default='gazetteer.tsv')
+    parser.add_argument('--alternate-names', metavar='PATH',
+                        help="GeoNames alternateNamesV2.txt for local names")
+    parser.add_argument('--country-info', metavar='PATH',
+                        help="GeoNames countryInfo.txt - adds each country's "
+                             "own languages to --languages")
+    parser.add_argument('--languages', default='en',
+                        help="comma-separated alternate name languages")
+    args = parser.parse_args()
+
+    convert(args.cities, args.output, args.min_population,
+            args.alternate_names, args.country_info,
+            [language for language in args.languages.split(',') if language])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,2044 @@
 #!/usr/bin/env python3
+import time
+
+# Začiatok importov - od neho meria --profile-startup
+STARTUP_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import font
-import requests
 from datetime import datetime, timedelta
+import argparse
+import importlib.util
 import json
+import math
+import mmap
+import os
+import queue
+import random
+import struct
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+# Voliteľné: NumPy zrýchli spracovanie dlhých sérií pre grafy. Importuje sa
+# na pozadí až po prvom vykreslení, dovtedy sú série v array('d')
+np = None
+
+# Voliteľné: kompaktné flatbuffers odpovede Open-Meteo (pip install openmeteo-sdk)
+# Pri štarte sa len overí, či je nainštalované, import až pri dekódovaní
+HAS_OPENMETEO_SDK = importlib.util.find_spec('openmeteo_sdk') is not None
+WeatherApiResponse = None
+
+# requests (urllib3, idna, detekcia kódovania) a Pillow sa importujú až
+# keď sú naozaj treba - na Pi Zero by inak zdržali prvé vykreslenie
+requests = None
+Image = ImageDraw = ImageFont = None
+
+
+def load_requests():
+    """Importuje requests pri prvom použití (vo fetch workeri)"""
+    global requests
+    if requests is None:
+        import requests.adapters
+    return requests
+
+
+def load_openmeteo_sdk():
+    """Importuje dekodér flatbuffers odpovedí (vo fetch workeri)"""
+    global WeatherApiResponse
+    if WeatherApiResponse is None:
+        from openmeteo_sdk.WeatherApiResponse import WeatherApiResponse
+    return WeatherApiResponse
+
+
+def load_numpy():
+    """Importuje NumPy, ak je nainštalovaný - nové série ho potom použijú"""
+    global np
+    if np is None:
+        try:
+            import numpy as np
+        except ImportError:
+            return False
+    return True
+
+
+def load_pillow():
+    """Importuje Pillow pre headless režim (PNG / framebuffer bez Tk)"""
+    global Image, ImageDraw, ImageFont
+    if Image is None:
+        try:
+            from PIL import Image, ImageDraw, ImageFont
+        except ImportError:
+            return False
+    return True
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'weather-pi')
+
+# História pozorovaní (binárne súbory po mesiacoch, adresár na polohu)
+HISTORY_DIR = os.path.join(os.path.expanduser('~'), '.local', 'share',
+                           'weather-pi', 'history')
+
+# Fonty pre headless režim
+HEADLESS_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
+HEADLESS_BOLD_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+# PIL nemá fallback fontov ako Tk/fontconfig - symboly, ktoré DejaVu nemá
+# (🌧, 💧, 💨...), sa berú z prvého nájdeného fontu
+HEADLESS_SYMBOL_FONTS = (
+    "/usr/share/fonts/truetype/noto/NotoEmoji-Regular.ttf",
+    "/usr/share/fonts/truetype/ancient-scripts/Symbola_hint.ttf",
+    "/usr/share/fonts/truetype/symbola/Symbola.ttf",
+)
+# Náhrady, keď symbol nemá ani záložný font ('' = vynechať)
+HEADLESS_GLYPH_SUBSTITUTES = {'🌤': '☀', '⛅': '☁', '🌧': '☂',
+                              '💧': '', '💨': '', '🌡': ''}
+
+# Ďalšie lokality, ktoré sa striedajú na vlastných stránkach, napr.
+# [{"name": "Košice, SK", "latitude": 48.72, "longitude": 21.26}]
+LOCATIONS_PATH = os.path.join(os.path.expanduser('~'), '.config',
+                              'weather-pi', 'locations.json')
+
+# Našepkávač miest: pauza po poslednom stlačení, počet návrhov, min. dĺžka
+SUGGEST_DEBOUNCE_MS = 400
+SUGGEST_COUNT = 3
+SUGGEST_MIN_CHARS = 2
+
+# Offline zoznam miest (vyrába ho build_gazetteer.py z GeoNames)
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'gazetteer.tsv')
+
+# Endpointy a ich timeouty (connect, read) v sekundách
+ENDPOINTS = {
+    'forecast': ("https://api.open-meteo.com/v1/forecast", (3.05, 10)),
+    'geocoding': ("https://geocoding-api.open-meteo.com/v1/search", (3.05, 5)),
+    'geolocation': ("http://ip-api.com/json/", (3.05, 5)),
+}
+
+# Open-Meteo prepočítava modely raz za hodinu, nové dáta sú k dispozícii
+# pár minút po celej hodine - častejšie sťahovanie nemá zmysel
+MODEL_UPDATE_INTERVAL = 3600
+MODEL_UPDATE_OFFSET = 5 * 60
+
+# Adaptívna obnova: pri búrke (WMO 95-99) v najbližších hodinách častejšie,
+# po chybách s backoffom a pri vypnutom displeji vôbec
+VOLATILE_INTERVAL = 15 * 60
+VOLATILE_HOURS = 3
+STORM_CODES = range(95, 100)
+REFRESH_RETRY_BASE = 60
+REFRESH_RETRY_MAX = 30 * 60
+SLEEP_POLL_INTERVAL = 60
+
+# Podsvietenie displeja - bl_power != 0 znamená, že displej spí
+BACKLIGHT_DIR = '/sys/class/backlight'
+
+# Rozlíšenie hodín v sekundách: 1 = zobrazuj sekundy, 60 = len minúty
+CLOCK_RESOLUTION = 1
+CLOCK_FORMATS = {1: "%A, %b %d  %H:%M:%S", 60: "%A, %b %d  %H:%M"}
+
+# Koľko hodín dopredu ukazujú grafy (24 = deň, 168 = týždeň, max 384)
+TREND_HOURS = 24
+
+# Polia histórie pozorovaní (v poradí záznamu) a čas na začiatku záznamov
+HISTORY_FIELDS = ('temperature', 'feels_like', 'humidity', 'pressure', 'wind')
+RECORD_TIME = struct.Struct('<q')
+
+# Koľko hodín nameranej histórie ukazujú grafy pred predpoveďou (0 = nič)
+HISTORY_HOURS = 24
+
+# Koľko hodín ukazuje hodinový pás (48 - 168)
+HOURLY_STRIP_HOURS = 48
+
+# Hranice histogramov časovačov v sekundách (Prometheus "le")
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1, 2.5, 5, 10)
+
+# Sonda event loopu: interval v ms a každý koľký tik zmerať RSS a widgety
+LAG_PROBE_INTERVAL = 1000
+RESOURCE_SAMPLE_EVERY = 15
+
+# Rozpočet na jeden snímok v sekundách - dlhšie snímky sa počítajú v metrikách
+FRAME_BUDGET = 0.05
+
+# Aké dáta potrebuje ktorá stránka - z nich sa skladá request na Open-Meteo
+PAGE_DATA_NEEDS = {
+    'combined': {
+        'current': ('temperature_2m', 'relative_humidity_2m',
+                    'apparent_temperature', 'weather_code',
+                    'surface_pressure', 'wind_speed_10m', 'is_day'),
+        'daily': ('weather_code', 'temperature_2m_max', 'temperature_2m_min',
+                  'precipitation_probability_max'),
+        'forecast_days': 5,
+    },
+    'site': {
+        'current': ('temperature_2m', 'relative_humidity_2m',
+                    'apparent_temperature', 'weather_code',
+                    'surface_pressure', 'wind_speed_10m', 'is_day'),
+        'daily': ('weather_code', 'temperature_2m_max', 'temperature_2m_min',
+                  'precipitation_probability_max'),
+        'forecast_days': 5,
+    },
+    'trends': {
+        'hourly': ('temperature_2m', 'relative_humidity_2m'),
+        'forecast_hours': TREND_HOURS,
+    },
+    'hourly': {
+        'hourly': ('temperature_2m', 'weather_code',
+                   'precipitation_probability', 'is_day'),
+        'forecast_hours': HOURLY_STRIP_HOURS,
+    },
+}
+
+# Premenné, ktoré JSON API vracia ako celé čísla
+INTEGER_VARIABLES = {'weather_code', 'relative_humidity_2m', 'is_day',
+                     'precipitation_probability',
+                     'precipitation_probability_max'}
+
+
+def build_forecast_params(page_names, compact=False):
+    """Poskladá parametre requestu len z toho, čo stránky naozaj zobrazujú"""
+    sections = {'current': [], 'hourly': [], 'daily': []}
+    forecast_days = 1
+    forecast_hours = 0
+
+    for name in page_names:
+        needs = PAGE_DATA_NEEDS[name]
+        for section, variables in sections.items():
+            for variable in needs.get(section, ()):
+                if variable not in variables:
+                    variables.append(variable)
+        forecast_days = max(forecast_days, needs.get('forecast_days', 1))
+        forecast_hours = max(forecast_hours, needs.get('forecast_hours', 0))
+
+    params = {'timezone': 'auto', 'forecast_days': forecast_days}
+    for section, variables in sections.items():
+        if variables:
+            params[section] = ','.join(variables)
+    if sections['hourly'] and forecast_hours:
+        params['forecast_hours'] = forecast_hours
+    if compact:
+        params['format'] = 'flatbuffers'
+    return params
+
+
+def decode_flatbuffers(content, params):
+    """Prevedie flatbuffers odpoveď na zoznam slovníkov (jeden na polohu)
+
+    Každá poloha je samostatná správa so 4-bajtovou hlavičkou s dĺžkou.
+    """
+    load_openmeteo_sdk()
+    results = []
+    position = 0
+    while position < len(content):
+        length = int.from_bytes(content[position:position + 4], 'little')
+        response = WeatherApiResponse.GetRootAs(content, position + 4)
+        results.append(decode_flatbuffers_response(response, params))
+        position += length + 4
+    return results
+
+
+def decode_flatbuffers_response(response, params):
+    """Jedna poloha z flatbuffers odpovede v rovnakom tvare ako JSON API"""
+    utc_offset = response.UtcOffsetSeconds()
+    epoch = datetime(1970, 1, 1)
+
+    def local_time(timestamp, fmt):
+        return (epoch + timedelta(seconds=timestamp + utc_offset)).strftime(fmt)
+
+    def value(name, raw):
+        if raw != raw:  # NaN = chýbajúca hodnota
+            return None
+        return int(round(raw)) if name in INTEGER_VARIABLES else raw
+
+    data = {
+        'latitude': response.Latitude(),
+        'longitude': response.Longitude(),
+        'utc_offset_seconds': utc_offset,
+    }
+
+    if 'current' in params:
+        current = response.Current()
+        data['current'] = {'time': local_time(current.Time(), '%Y-%m-%dT%H:%M')}
+        for i, name in enumerate(params['current'].split(',')):
+            data['current'][name] = value(name, current.Variables(i).Value())
+
+    blocks = (('hourly', response.Hourly, '%Y-%m-%dT%H:%M'),
+              ('daily', response.Daily, '%Y-%m-%d'))
+    for section, accessor, fmt in blocks:
+        if section not in params:
+            continue
+        block = accessor()
+        times = range(block.Time(), block.TimeEnd(), block.Interval())
+        data[section] = {'time': [local_time(t, fmt) for t in times]}
+        for i, name in enumerate(params[section].split(',')):
+            variable = block.Variables(i)
+            data[section][name] = [value(name, variable.Values(j))
+                                   for j in range(variable.ValuesLength())]
+
+    return data
+
+
+def fetch_forecast(http, forecast_params, coordinates):
+    """Predpoveď pre zoznam (lat, lon) jedným requestom, v rovnakom poradí"""
+    params = dict(
+        forecast_params,
+        latitude=','.join(str(lat) for lat, lon in coordinates),
+        longitude=','.join(str(lon) for lat, lon in coordinates))
+
+    if params.get('format') == 'flatbuffers':
+        content = http.get_content('forecast', params)
+        with METRICS.timer('parse_seconds', stage='decode'):
+            return decode_flatbuffers(content, params)
+
+    response = http.get('forecast', params)
+    with METRICS.timer('parse_seconds', stage='decode'):
+        data = response.json()
+    # Pre jednu polohu API vracia objekt, pre viac zoznam
+    return data if isinstance(data, list) else [data]
+
+
+def load_locations(path=LOCATIONS_PATH):
+    """Načíta zoznam ďalších lokalít, chýbajúci súbor = žiadne"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            locations = json.load(f)
+        return [{'name': loc['name'],
+                 'latitude': float(loc['latitude']),
+                 'longitude': float(loc['longitude'])} for loc in locations]
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error reading locations: {e}")
+        return []
+
+
+def make_series(values):
+    """Prevedie zoznam hodnôt na numerickú sériu (None = NaN)"""
+    if np is not None:
+        return np.array([math.nan if v is None else v for v in values],
+                        dtype=float)
+    return array('d', (math.nan if v is None else v for v in values))
+
+
+def is_ndarray(series):
+    """Séria z NumPy? (série vytvorené pred importom NumPy sú array)"""
+    return np is not None and isinstance(series, np.ndarray)
+
+
+def series_bounds(series):
+    """Minimum a maximum série v jednom prechode, chýbajúce hodnoty ignoruje"""
+    if is_ndarray(series):
+        if len(series) == 0 or np.isnan(series).all():
+            return None, None
+        return float(np.nanmin(series)), float(np.nanmax(series))
+
+    low = high = None
+    for value in series:
+        if value != value:
+            continue
+        if low is None or value < low:
+            low = value
+        if high is None or value > high:
+            high = value
+    return low, high
+
+
+def downsample_minmax(series, buckets):
+    """Min/max bucketing - z každého bucketu ponechá extrémy v poradí trendu
+
+    Vráti (indexy, hodnoty); kratšie série vráti nezmenené.
+    """
+    n = len(series)
+    if buckets <= 0 or n <= 2 * buckets:
+        return range(n), series
+
+    if is_ndarray(series):
+        edges = np.linspace(0, n, buckets + 1).astype(int)
+        starts = edges[:-1]
+        lows = np.fmin.reduceat(series, starts)
+        highs = np.fmax.reduceat(series, starts)
+        rising = series[starts] <= series[edges[1:] - 1]
+        centers = (starts + edges[1:] - 1) / 2
+        first = np.where(rising, lows, highs)
+        second = np.where(rising, highs, lows)
+        indexes = np.repeat(centers, 2)
+        values = np.empty(2 * buckets)
+        values[0::2] = first
+        values[1::2] = second
+        return indexes, values
+
+    indexes = []
+    values = array('d')
+    for b in range(buckets):
+        start = b * n // buckets
+        end = (b + 1) * n // buckets
+        chunk = [v for v in series[start:end] if v == v]
+        if not chunk:
+            continue
+        low, high = min(chunk), max(chunk)
+        center = (start + end - 1) / 2
+        pair = (low, high) if series[start] <= series[end - 1] else (high, low)
+        indexes.extend((center, center))
+        values.extend(pair)
+    return indexes, values
+
+
+def series_to_points(series, min_val, max_val, x0, y0, width, height):
+    """Normalizuje sériu do plochy grafu a vráti plochý zoznam [x, y, ...]
+
+    Séria sa najprv zredukuje na približne jeden bod na dva pixely šírky,
+    takže dlhé série stoja pri kreslení rovnako ako krátke.
+    """
+    n = len(series)
+    if n < 2:
+        return []
+
+    indexes, values = downsample_minmax(series, int(width) // 2)
+    span = max_val - min_val
+    x_scale = width / (n - 1)
+
+    if np is not None:
+        indexes = np.asarray(indexes, dtype=float)
+        values = np.asarray(values, dtype=float)
+        normalized = (values - min_val) / span if span else np.full(
+            len(values), 0.5)
+        keep = ~np.isnan(normalized)
+        points = np.empty((int(keep.sum()), 2))
+        points[:, 0] = x0 + indexes[keep] * x_scale
+        points[:, 1] = y0 + height - normalized[keep] * height
+        return points.ravel().tolist()
+
+    points = []
+    for i, value in zip(indexes, values):
+        if value != value:
+            continue
+        normalized = (value - min_val) / span if span else 0.5
+        points.append(x0 + i * x_scale)
+        points.append(y0 + height - normalized * height)
+    return points
+
+
+# WMO weather code -> ikona (deň, noc); v noci sa slnko mení na mesiac
+WEATHER_ICONS = {
+    0: ("☀", "☾"),     # Clear sky (slnko)
+    1: ("🌤", "☾"),     # Mainly clear
+    2: ("⛅", "☁"),     # Partly cloudy
+    3: ("☁", "☁"),     # Overcast (oblačno)
+    45: ("≡", "≡"),    # Foggy (hmla)
+    48: ("≡", "≡"),    # Rime fog
+    51: ("∴", "∴"),    # Light drizzle (mrholenie)
+    53: ("∴", "∴"),    # Moderate drizzle
+    55: (":::", ":::"),  # Dense drizzle
+    61: ("🌧", "🌧"),    # Slight rain (dážď)
+    63: ("🌧", "🌧"),    # Moderate rain
+    65: ("🌧", "🌧"),    # Heavy rain
+    71: ("❄", "❄"),    # Slight snow (sneh)
+    73: ("❄", "❄"),    # Moderate snow
+    75: ("❄❄", "❄❄"),  # Heavy snow
+    77: ("❄", "❄"),    # Snow grains
+    80: ("∴", "∴"),    # Slight rain showers
+    81: (":::", ":::"),  # Moderate rain showers
+    82: ("⚡", "⚡"),    # Violent rain showers
+    85: ("❄", "❄"),    # Slight snow showers
+    86: ("❄❄", "❄❄"),  # Heavy snow showers
+    95: ("⚡", "⚡"),    # Thunderstorm (búrka)
+    96: ("⚡❄", "⚡❄"),  # Thunderstorm with hail
+    99: ("⚡⚡", "⚡⚡")   # Severe thunderstorm
+}
+
+# Popisy WMO kódov v jednotlivých jazykoch
+WEATHER_DESCRIPTIONS = {
+    'en': {
+        0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+        45: "Foggy", 48: "Rime fog",
+        51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+        61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+        71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow", 77: "Snow grains",
+        80: "Rain showers", 81: "Moderate showers", 82: "Heavy showers",
+        85: "Snow showers", 86: "Heavy snow showers",
+        95: "Thunderstorm", 96: "Thunderstorm + hail", 99: "Severe thunderstorm"
+    },
+    'sk': {
+        0: "Jasno", 1: "Prevažne jasno", 2: "Polojasno", 3: "Zamračené",
+        45: "Hmla", 48: "Námraza",
+        51: "Slabé mrholenie", 53: "Mrholenie", 55: "Silné mrholenie",
+        61: "Slabý dážď", 63: "Dážď", 65: "Silný dážď",
+        71: "Slabé sneženie", 73: "Sneženie", 75: "Silné sneženie", 77: "Snehové zrná",
+        80: "Prehánky", 81: "Dažďové prehánky", 82: "Silné prehánky",
+        85: "Snehové prehánky", 86: "Silné snehové prehánky",
+        95: "Búrka", 96: "Búrka s krupobitím", 99: "Silná búrka"
+    },
+}
+
+# Jazyk popisov počasia ('en' alebo 'sk')
+LANGUAGE = 'en'
+
+# WMO kódy sú 0-99, tabuľky sa indexujú priamo kódom
+WMO_CODE_COUNT = 100
+
+
+def build_code_table(mapping, default):
+    """Nemenná tabuľka indexovaná WMO kódom - jedno indexovanie namiesto dict"""
+    table = [default] * WMO_CODE_COUNT
+    for code, value in mapping.items():
+        table[code] = value
+    return tuple(table)
+
+
+DAY_ICONS = build_code_table(
+    {code: icons[0] for code, icons in WEATHER_ICONS.items()}, "?")
+NIGHT_ICONS = build_code_table(
+    {code: icons[1] for code, icons in WEATHER_ICONS.items()}, "?")
+DESCRIPTIONS = build_code_table(
+    WEATHER_DESCRIPTIONS.get(LANGUAGE, WEATHER_DESCRIPTIONS['en']), "Unknown")
+
+
+def weather_icon(weather_code, is_day=True):
+    """Vráti textovú ikonu podľa WMO weather code"""
+    if weather_code is None or not 0 <= weather_code < WMO_CODE_COUNT:
+        return "?"
+    return (DAY_ICONS if is_day else NIGHT_ICONS)[weather_code]
+
+
+def weather_description(weather_code):
+    """Prevedie WMO weather code na popis"""
+    if weather_code is None or not 0 <= weather_code < WMO_CODE_COUNT:
+        return "Unknown"
+    return DESCRIPTIONS[weather_code]
+
+
+def format_value(value, fmt):
+    """Naformátuje hodnotu, chýbajúcu (None) zobrazí ako --"""
+    return "--" if value is None else fmt.format(value)
+
+
+def rounded(value, digits=None):
+    if value is None:
+        return None
+    return round(value, digits) if digits else round(value)
+
+
+@dataclass(frozen=True)
+class CurrentWeather:
+    """Aktuálne počasie s predpripravenými textami pre widgety"""
+    __slots__ = ('time', 'temperature', 'feels_like', 'humidity', 'pressure',
+                 'wind', 'weather_code', 'icon', 'description', 'temp_text',
+                 'feels_text', 'humidity_text', 'wind_text', 'pressure_text')
+
+    time: str
+    temperature: float
+    feels_like: float
+    humidity: int
+    pressure: float
+    wind: float
+    weather_code: int
+    icon: str
+    description: str
+    temp_text: str
+    feels_text: str
+    humidity_text: str
+    wind_text: str
+    pressure_text: str
+
+    @classmethod
+    def from_api(cls, current):
+        code = current.get('weather_code')
+        return cls(
+            time=current.get('time', ''),
+            temperature=current.get('temperature_2m'),
+            feels_like=current.get('apparent_temperature'),
+            humidity=current.get('relative_humidity_2m'),
+            pressure=current.get('surface_pressure'),
+            wind=current.get('wind_speed_10m'),
+            weather_code=code,
+            icon=weather_icon(code, current.get('is_day', 1)),
+            description=weather_description(code),
+            temp_text=format_value(
+                rounded(current.get('temperature_2m')), "{}°C"),
+            feels_text="Feels: " + format_value(
+                rounded(current.get('apparent_temperature')), "{}°C"),
+            humidity_text="💧 " + format_value(
+                current.get('relative_humidity_2m'), "{}%"),
+            wind_text="💨 " + format_value(
+                rounded(current.get('wind_speed_10m'), 1), "{} km/h"),
+            pressure_text="🌡 " + format_value(
+                rounded(current.get('surface_pressure')), "{} hPa"),
+        )
+
+
+@dataclass(frozen=True)
+class DailyForecast:
+    """Jeden deň predpovede s predpripravenými textami"""
+    __slots__ = ('date', 'weather_code', 'day_name', 'icon', 'max_text',
+                 'min_text', 'rain_text')
+
+    date: str
+    weather_code: int
+    day_name: str
+    icon: str
+    max_text: str
+    min_text: str
+    rain_text: str
+
+
+@dataclass(frozen=True)
+class HourlyCell:
+    """Jedna hodina v hodinovom páse s predpripravenými textami"""
+    __slots__ = ('time_text', 'icon', 'temp_text', 'rain_text')
+
+    time_text: str
+    icon: str
+    temp_text: str
+    rain_text: str
+
+
+def build_hourly_cells(hourly):
+    """Texty pre hodinový pás - o polnoci ukáže namiesto času deň"""
+    times = hourly.get('time', [])
+    codes = hourly.get('weather_code')
+    if not codes:
+        return ()
+
+    temps = hourly.get('temperature_2m') or [None] * len(times)
+    rain = hourly.get('precipitation_probability') or [None] * len(times)
+    is_day = hourly.get('is_day') or [1] * len(times)
+
+    cells = []
+    for i, time_str in enumerate(times[:HOURLY_STRIP_HOURS]):
+        moment = datetime.fromisoformat(time_str)
+        cells.append(HourlyCell(
+            time_text=(moment.strftime("%a") if moment.hour == 0
+                       else moment.strftime("%H:%M")),
+            icon=weather_icon(codes[i], is_day[i]),
+            temp_text=format_value(rounded(temps[i]), "{}°"),
+            rain_text=format_value(rain[i], "{}%"),
+        ))
+    return tuple(cells)
+
+
+@dataclass
+class HourlySeries:
+    """Hodinové série ako numerické polia (NumPy alebo array)"""
+    __slots__ = ('time', 'temperature', 'humidity', 'temperature_bounds',
+                 'cells')
+
+    time: list
+    temperature: object
+    humidity: object
+    temperature_bounds: tuple
+    cells: tuple
+
+    @classmethod
+    def from_api(cls, hourly):
+        temperature = make_series(hourly.get('temperature_2m', []))
+        return cls(
+            time=hourly.get('time', []),
+            temperature=temperature,
+            humidity=make_series(hourly.get('relative_humidity_2m', [])),
+            temperature_bounds=series_bounds(temperature[:TREND_HOURS]),
+            cells=build_hourly_cells(hourly),
+        )
+
+
+@dataclass
+class WeatherSnapshot:
+    """Jedna odpoveď Open-Meteo rozparsovaná raz po stiahnutí
+
+    raw je pôvodný JSON kvôli cache na disku a porovnávaniu zmien.
+    """
+    __slots__ = ('current', 'daily', 'hourly', 'raw')
+
+    current: CurrentWeather
+    daily: tuple
+    hourly: HourlySeries
+    raw: dict
+
+    @classmethod
+    def from_api(cls, data):
+        current = None
+        if 'current' in data:
+            current = CurrentWeather.from_api(data['current'])
+
+        days = []
+        daily = data.get('daily', {})
+        for i, date in enumerate(daily.get('time', [])):
+            code = daily['weather_code'][i]
+            days.append(DailyForecast(
+                date=date,
+                weather_code=code,
+                day_name=datetime.fromisoformat(date).strftime("%a"),
+                icon=weather_icon(code),
+                max_text=format_value(
+                    rounded(daily['temperature_2m_max'][i]), "{}°"),
+                min_text=format_value(
+                    rounded(daily['temperature_2m_min'][i]), "{}°"),
+                rain_text="💧 " + format_value(
+                    daily['precipitation_probability_max'][i], "{}%"),
+            ))
+
+        hourly = None
+        if 'hourly' in data:
+            hourly = HourlySeries.from_api(data['hourly'])
+
+        return cls(current=current, daily=tuple(days), hourly=hourly, raw=data)
+
+    def changed(self, previous, section):
+        """Zmenila sa časť current/daily/hourly oproti predchádzajúcemu stavu?"""
+        if previous is None:
+            return True
+        return self.raw.get(section) != previous.raw.get(section)
+
+
+def next_model_update_delay(now=None):
+    """Sekundy do najbližšej publikácie nových dát modelu"""
+    if now is None:
+        now = time.time()
+    slot = now - now % MODEL_UPDATE_INTERVAL + MODEL_UPDATE_OFFSET
+    if slot <= now:
+        slot += MODEL_UPDATE_INTERVAL
+    return slot - now
+
+
+def refresh_delay(failures, volatile, now=None):
+    """Sekundy do ďalšej obnovy - backoff po chybách, inak podľa modelu"""
+    if failures:
+        # Exponenciálny backoff s polovičným jitterom
+        ceiling = min(REFRESH_RETRY_MAX,
+                      REFRESH_RETRY_BASE * 2 ** (failures - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    # Normálne až keď upstream publikuje nový beh modelu
+    delay = next_model_update_delay(now)
+    if volatile:
+        delay = min(delay, VOLATILE_INTERVAL)
+    return delay
+
+
+def forecast_volatile(snapshot, hours=VOLATILE_HOURS):
+    """Hrozí teraz alebo v najbližších hodinách búrka (WMO 95-99)?"""
+    codes = list((snapshot.raw.get('hourly') or {}).get('weather_code', [])[:hours])
+    if snapshot.current:
+        codes.append(snapshot.current.weather_code)
+    return any(code in STORM_CODES for code in codes)
+
+
+def display_asleep(backlight_dir=BACKLIGHT_DIR):
+    """Je displej vypnutý? Bez podsvietenia v sysfs sa predpokladá, že nie"""
+    try:
+        names = os.listdir(backlight_dir)
+    except OSError:
+        return False
+    for name in names:
+        try:
+            with open(os.path.join(backlight_dir, name, 'bl_power'), 'r') as f:
+                if int(f.read().strip()) == 0:
+                    return False
+        except (OSError, ValueError):
+            return False
+    return bool(names)
+
+
+class Metrics:
+    """Časovače (histogramy), počítadlá a gauge v pamäti
+
+    Zapisovať sa dá z ľubovoľného vlákna, render() ich vráti v textovom
+    formáte Prometheus pre /metrics.
+    """
+
+    PREFIX = 'weather_pi_'
+
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe(self, name, value, **labels):
+        key = name, tuple(sorted(labels.items()))
+        slot = bisect_left(self.buckets, value)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                # [počty v bucketoch (posledný = +Inf), súčet, počet]
+                histogram = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self.histograms[key] = histogram
+            histogram[0][slot] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def inc(self, name, amount=1, **labels):
+        key = name, tuple(sorted(labels.items()))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        key = name, tuple(sorted(labels.items()))
+        with self.lock:
+            self.gauges[key] = value
+
+    @staticmethod
+    def format_labels(labels):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+    def render(self):
+        """Textový formát Prometheus (text/plain; version=0.0.4)"""
+        lines = []
+        with self.lock:
+            for kind, values in (('counter', self.counters),
+                                 ('gauge', self.gauges)):
+                last_name = None
+                for (name, labels), value in sorted(values.items()):
+                    if name != last_name:
+                        lines.append(f"# TYPE {self.PREFIX}{name} {kind}")
+                        last_name = name
+                    lines.append(f"{self.PREFIX}{name}"
+                                 f"{self.format_labels(labels)} {value}")
+
+            last_name = None
+            for (name, labels), (counts, total, count) in sorted(
+                    self.histograms.items()):
+                metric = self.PREFIX + name
+                if name != last_name:
+                    lines.append(f"# TYPE {metric} histogram")
+                    last_name = name
+                cumulative = 0
+                bounds = [str(b) for b in self.buckets] + ['+Inf']
+                for bound, bucket_count in zip(bounds, counts):
+                    cumulative += bucket_count
+                    bucket_labels = self.format_labels(labels + (('le', bound),))
+                    lines.append(f"{metric}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{metric}_sum{self.format_labels(labels)} {total}")
+                lines.append(f"{metric}_count{self.format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+# Spoločné metriky procesu - časovače ich plnia z UI aj z fetch workera
+METRICS = Metrics()
+
+
+def resident_memory():
+    """RSS procesu v bajtoch z /proc (Linux), inde None"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def count_widgets(widget):
+    """Počet widgetov v strome (vrátane skrytých stránok)"""
+    count = 0
+    stack = [widget]
+    while stack:
+        count += 1
+        stack.extend(stack.pop().winfo_children())
+    return count
+
+
+def start_metrics_server(metrics, port, host='127.0.0.1'):
+    """HTTP endpoint /metrics v samostatnom vlákne (Prometheus scrape)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type',
+                             'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics',
+                     daemon=True).start()
+    print(f"Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+class LoopProbe:
+    """Meria, o koľko neskôr než naplánované sa spúšťajú after callbacky
+
+    Každý RESOURCE_SAMPLE_EVERY-tý tik zapíše aj RSS a počet widgetov.
+    """
+
+    def __init__(self, root, metrics, interval=LAG_PROBE_INTERVAL):
+        self.root = root
+        self.metrics = metrics
+        self.interval = interval
+        self.ticks = 0
+        self.expected = None
+        self.timer = None
+
+    def start(self):
+        self.stop()
+        self.schedule()
+
+    def stop(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+
+    def schedule(self):
+        self.expected = time.monotonic() + self.interval / 1000
+        self.timer = self.root.after(self.interval, self.tick)
+
+    def tick(self):
+        lag = max(0.0, time.monotonic() - self.expected)
+        self.metrics.observe('event_loop_lag_seconds', lag)
+        if self.ticks % RESOURCE_SAMPLE_EVERY == 0:
+            self.sample_resources()
+        self.ticks += 1
+        self.schedule()
+
+    def sample_resources(self):
+        rss = resident_memory()
+        if rss is not None:
+            self.metrics.set_gauge('process_resident_memory_bytes', rss)
+        self.metrics.set_gauge('tk_widgets', count_widgets(self.root))
+
+
+class FetchWorker:
+    """Spúšťa sieťové požiadavky mimo Tk vlákna a výsledky vracia cez frontu
+
+    Fronta sa kontroluje len kým beží nejaká úloha - bez práce sa Tk
+    vlákno nebudí. submit() sa volá z Tk vlákna.
+    """
+
+    def __init__(self, root, max_workers=2, poll_interval=100):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='fetch')
+        self.results = queue.Queue()
+        self.pending = 0
+        self.poll_timer = None
+
+    def submit(self, func, callback, *args, errback=None):
+        """Spustí func(*args) na pozadí, callback dostane výsledok v Tk vlákne"""
+        def run():
+            try:
+                result = func(*args)
+            except Exception as e:
+                self.results.put((errback, e))
+            else:
+                self.results.put((callback, result))
+
+        def finished(future):
+            # Zrušená úloha nebežala - aj tak musí uvoľniť svoje miesto
+            if future.cancelled():
+                self.results.put((None, None))
+
+        future = self.executor.submit(run)
+        future.add_done_callback(finished)
+        self.pending += 1
+        if self.poll_timer is None:
+            self.poll_timer = self.root.after(self.poll_interval, self.drain)
+        return future
+
+    def drain(self):
+        """Vyprázdni frontu výsledkov - volá sa cez root.after"""
+        self.poll_timer = None
+        while True:
+            try:
+                callback, value = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            if callback is None:
+                continue
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"Error in fetch callback: {e}")
+        # Callback mohol pridať novú úlohu a tá už timer naplánovala
+        if self.pending > 0 and self.poll_timer is None:
+            self.poll_timer = self.root.after(self.poll_interval, self.drain)
+
+    def shutdown(self):
+        if self.poll_timer:
+            self.root.after_cancel(self.poll_timer)
+            self.poll_timer = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FrameScheduler:
+    """Zlúči zmeny widgetov do jedného snímku v root.after_idle
+
+    Aktualizácia dát a prepnutie stránky tak vyvolajú len jeden prepočet
+    geometrie a jedno prekreslenie. Trvanie snímku sa meria proti budget.
+    """
+
+    def __init__(self, root, budget=FRAME_BUDGET):
+        self.root = root
+        self.budget = budget
+        self.actions = {}
+        self.options = {}
+        self.idle_job = None
+        self.flushing = False
+
+    def call(self, func, *args):
+        """Akcia v najbližšom snímku, opakovaná sa presunie na koniec"""
+        key = func, args
+        self.actions.pop(key, None)
+        self.actions[key] = None
+        self.schedule()
+
+    def configure(self, widget, **options):
+        self.options.setdefault(widget, {}).update(options)
+        self.schedule()
+
+    def schedule(self):
+        # Počas flush sa zmeny pridajú do bežiaceho snímku
+        if self.idle_job is None and not self.flushing:
+            self.idle_job = self.root.after_idle(self.flush)
+
+    def flush(self):
+        self.idle_job = None
+        self.flushing = True
+        start = time.perf_counter()
+        try:
+            # Akcie (prekreslenie stránky) ešte môžu pridať zmeny widgetov
+            while self.actions or self.options:
+                actions, self.actions = self.actions, {}
+                for func, args in actions:
+                    try:
+                        func(*args)
+                    except Exception as e:
+                        print(f"Error in frame action: {e}")
+
+                options, self.options = self.options, {}
+                for widget, changes in options.items():
+                    try:
+                        widget.config(**changes)
+                    except tk.TclError:
+                        pass
+
+            # Geometria a prekreslenie patria do toho istého snímku
+            self.root.update_idletasks()
+        finally:
+            self.flushing = False
+
+        # Zmeny z <Configure> počas update_idletasks pôjdu do ďalšieho snímku
+        if self.actions or self.options:
+            self.schedule()
+
+        elapsed = time.perf_counter() - start
+        METRICS.observe('frame_seconds', elapsed)
+        if elapsed > self.budget:
+            METRICS.inc('frames_over_budget_total')
+
+    def cancel(self):
+        if self.idle_job is not None:
+            self.root.after_cancel(self.idle_job)
+            self.idle_job = None
+        self.actions.clear()
+        self.options.clear()
+
+
+class HttpClient:
+    """Zdieľaná HTTP session s keep-alive, poolom spojení a opakovaním pokusov"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, retries=3, backoff_base=1.0, backoff_max=30.0):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.lock = threading.Lock()
+        self.session = None
+
+    def get_session(self):
+        """Session sa vytvorí pri prvom requeste, nie pri štarte aplikácie"""
+        with self.lock:
+            if self.session is None:
+                load_requests()
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=len(ENDPOINTS), pool_maxsize=2)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                session.headers['User-Agent'] = 'weather-pi'
+                self.session = session
+            return self.session
+
+    def backoff_delay(self, attempt):
+        """Exponenciálny backoff s plným jitterom"""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def get_json(self, endpoint, params=None):
+        return self.get(endpoint, params).json()
+
+    def get_content(self, endpoint, params=None):
+        return self.get(endpoint, params).content
+
+    def get(self, endpoint, params=None):
+        """GET na pomenovaný endpoint - volať len z fetch workera"""
+        url, timeout = ENDPOINTS[endpoint]
+        session = self.get_session()
+
+        for attempt in range(self.retries + 1):
+            last_try = attempt == self.retries
+            try:
+                with METRICS.timer('http_request_seconds', endpoint=endpoint):
+                    response = session.get(url, params=params, timeout=timeout)
+                if response.status_code in self.RETRY_STATUSES and not last_try:
+                    raise requests.HTTPError(
+                        f"HTTP {response.status_code}", response=response)
+                response.raise_for_status()
+                return response
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.HTTPError) as e:
+                METRICS.inc('http_errors_total', endpoint=endpoint)
+                status = e.response.status_code if e.response is not None else None
+                if last_try or (status is not None and status not in self.RETRY_STATUSES):
+                    raise
+                delay = self.backoff_delay(attempt)
+                print(f"Request to {endpoint} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+
+
+class ForecastCache:
+    """Posledné odpovede get_weather na disku, kľúčované zaokrúhlenou polohou"""
+
+    def __init__(self, path=None, ttl=600, max_entries=8):
+        self.path = path or os.path.join(CACHE_DIR, 'forecast.json')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.last_key = None
+        self.snapshots = {}
+        self.load()
+
+    @staticmethod
+    def make_key(latitude, longitude):
+        return f"{round(latitude, 2):.2f},{round(longitude, 2):.2f}"
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            self.entries = stored.get('entries', {})
+            self.last_key = stored.get('last')
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error reading forecast cache: {e}")
+
+    def get(self, latitude, longitude):
+        """Vráti uložený záznam pre polohu alebo None"""
+        return self.entries.get(self.make_key(latitude, longitude))
+
+    def latest(self):
+        """Naposledy uložený záznam - na okamžitý štart bez siete"""
+        return self.entries.get(self.last_key)
+
+    def snapshot(self, entry):
+        """Rozparsovaný záznam - parsuje sa len raz pre každé stiahnutie"""
+        key = self.make_key(entry['latitude'], entry['longitude'])
+        cached = self.snapshots.get(key)
+        if cached is None or cached[0] != entry['fetched_at']:
+            cached = (entry['fetched_at'], WeatherSnapshot.from_api(entry['data']))
+            self.snapshots[key] = cached
+        return cached[1]
+
+    def age(self, entry):
+        return time.time() - entry['fetched_at']
+
+    def is_fresh(self, entry):
+        return entry is not None and self.age(entry) < self.ttl
+
+    def store(self, latitude, longitude, city, snapshot, primary=True):
+        """Uloží odpoveď na disk (atomicky cez dočasný súbor)
+
+        Len hlavná poloha (primary) sa pamätá ako posledná pre warm start.
+        """
+        self.store_many([(latitude, longitude, city, snapshot, primary)])
+
+    def store_many(self, items):
+        """Uloží celú dávku (latitude, longitude, city, snapshot, primary)
+
+        Súbor so všetkými polohami sa prepíše len raz za dávku.
+        """
+        with self.lock:
+            fetched_at = time.time()
+            for latitude, longitude, city, snapshot, primary in items:
+                key = self.make_key(latitude, longitude)
+                self.entries[key] = {
+                    'fetched_at': fetched_at,
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'city': city,
+                    'data': snapshot.raw
+                }
+                self.snapshots[key] = (fetched_at, snapshot)
+                if primary:
+                    self.last_key = key
+
+            # Najstaršie polohy zahoď
+            if len(self.entries) > self.max_entries:
+                ordered = sorted(self.entries,
+                                 key=lambda k: self.entries[k]['fetched_at'])
+                for old_key in ordered[:len(self.entries) - self.max_entries]:
+                    del self.entries[old_key]
+                    self.snapshots.pop(old_key, None)
+
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + '.tmp'
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'last': self.last_key,
+                               'entries': self.entries}, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error writing forecast cache: {e}")
+
+
+class ClockTicker:
+    """Volá callback presne na hranici sekundy/minúty, kým nie je zastavený"""
+
+    def __init__(self, root, callback, resolution=1):
+        self.root = root
+        self.callback = callback
+        self.resolution = resolution
+        self.timer = None
+
+    def start(self):
+        if self.timer is None:
+            self.tick()
+
+    def stop(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+
+    def tick(self):
+        now = datetime.now()
+        self.callback(now)
+        self.timer = self.root.after(self.delay_ms(now), self.tick)
+
+    def delay_ms(self, now):
+        """Čas do ďalšej hranice - root.after sa tak nerozchádza s hodinami"""
+        elapsed = now.timestamp() % self.resolution
+        return int((self.resolution - elapsed) * 1000) + 5
+
+
+class RefreshScheduler:
+    """Jediný časovač obnovy predpovede
+
+    request() zlúči opakované požiadavky do jedného fetchu (aj keď práve
+    beží). Po done() sa ďalší termín určí podľa chýb (backoff), volatility
+    predpovede a časov publikácie modelu; keď displej spí, nesťahuje sa.
+    refresh_now() obnoví hneď a odpočet začne odznova. on_change sa volá
+    pri každej zmene termínu (due) alebo stavu.
+    """
+
+    def __init__(self, root, refresh, on_change=None):
+        self.root = root
+        self.refresh = refresh
+        self.on_change = on_change
+        self.timer = None
+        self.due = None
+        self.running = False
+        self.requested = None
+        self.forced = False
+        self.failures = 0
+        self.volatile = False
+
+    def notify(self):
+        if self.on_change:
+            self.on_change()
+
+    def request(self, delay=0):
+        """Obnov najneskôr o delay sekúnd - skorší naplánovaný termín ostáva"""
+        due = time.time() + max(0, delay)
+        if self.running:
+            # Dobehne po aktuálnom fetchi
+            if self.requested is None or due < self.requested:
+                self.requested = due
+            return
+        if self.timer is not None and self.due <= due:
+            return
+        self.schedule(due)
+
+    def schedule(self, due):
+        """Zruší naplánovanú obnovu a naplánuje ju na čas due"""
+        self.cancel()
+        self.due = due
+        delay_ms = max(0, int((due - time.time()) * 1000))
+        self.timer = self.root.after(delay_ms, self.run)
+        self.notify()
+
+    def cancel(self):
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+            self.timer = None
+            self.due = None
+
+    def refresh_now(self):
+        """Obnov hneď, aj keď je cache čerstvá, a začni odpočet odznova"""
+        self.failures = 0
+        self.forced = True
+        if self.running:
+            self.requested = time.time()
+            return
+        self.cancel()
+        self.run()
+
+    def run(self):
+        self.timer = None
+        self.due = None
+        force, self.forced = self.forced, False
+        if not force and display_asleep():
+            # Po prebudení displeja sa obnoví pri najbližšej kontrole
+            self.schedule(time.time() + SLEEP_POLL_INTERVAL)
+            return
+
+        self.running = True
+        self.notify()
+        try:
+            self.refresh(force)
+        except Exception:
+            self.done(False)
+            raise
+
+    def done(self, success=True, snapshots=()):
+        """Fetch skončil - naplánuje ďalší podľa výsledku a predpovede"""
+        self.running = False
+        if success:
+            self.failures = 0
+            self.volatile = any(forecast_volatile(s) for s in snapshots if s)
+        else:
+            self.failures += 1
+
+        due = time.time() + self.next_delay()
+        if self.requested is not None:
+            due = min(due, self.requested)
+            self.requested = None
+        self.schedule(due)
+
+    def next_delay(self, now=None):
+        return refresh_delay(self.failures, self.volatile, now)
+
+
+def read_records(path, record, start, end):
+    """Záznamy s časom start <= t < end zo súboru zoradeného podľa času
+
+    Súbor sa namapuje cez mmap a hranice sa nájdu bisectom nad časmi
+    (prvých 8 bajtov záznamu) - prečíta sa len požadovaný rozsah.
+    """
+    size = record.size
+
+    class RecordTimes:
+        """Časy záznamov ako sekvencia pre bisect"""
+        def __init__(self, view, count):
+            self.view = view
+            self.count = count
+
+        def __len__(self):
+            return self.count
+
+        def __getitem__(self, i):
+            return RECORD_TIME.unpack_from(self.view, i * size)[0]
+
+    try:
+        with open(path, 'rb') as f:
+            count = os.fstat(f.fileno()).st_size // size
+            if not count:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                times = RecordTimes(view, count)
+                low = bisect_left(times, start)
+                high = bisect_left(times, end, low)
+                return list(record.iter_unpack(view[low * size:high * size]))
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError) as e:
+        print(f"Error reading history: {e}")
+        return []
+
+
+def last_record(path, record):
+    """Posledný záznam súboru; neúplný záznam na konci (pád pri zápise) odreže"""
+    size = record.size
+    try:
+        with open(path, 'r+b') as f:
+            length = os.fstat(f.fileno()).st_size
+            if length % size:
+                length -= length % size
+                f.truncate(length)
+            if not length:
+                return None
+            f.seek(length - size)
+            return record.unpack(f.read(size))
+    except FileNotFoundError:
+        return None
+
+
+class RollupFile:
+    """Agregáty jednej polohy v jednom rozlíšení (hodina alebo deň)
+
+    Záznam je jeden bucket s počtom, súčtom, minimom a maximom každého poľa,
+    zoradené podľa času. Pozorovania chodia v poradí, takže sa mení len
+    posledný bucket - ten sa prepíše na mieste, nový sa pripojí na koniec.
+    """
+
+    RECORD = struct.Struct('<q' + 'Idff' * len(HISTORY_FIELDS) + '4x')
+
+    def __init__(self, path, width):
+        self.path = path
+        self.width = width
+        # (začiatok bucketu, [[počet, súčet, min, max] pre každé pole])
+        self.last = None
+
+    def bucket(self, timestamp, offset):
+        """Začiatok bucketu v UTC - dni začínajú miestnou polnocou"""
+        local = timestamp + offset
+        return local - local % self.width - offset
+
+    @staticmethod
+    def empty_stats():
+        return [[0, 0.0, math.inf, -math.inf] for _ in HISTORY_FIELDS]
+
+    @staticmethod
+    def accumulate(stats, values):
+        for field, value in zip(stats, values):
+            if value == value:
+                field[0] += 1
+                field[1] += value
+                field[2] = min(field[2], value)
+                field[3] = max(field[3], value)
+
+    def pack(self, bucket, stats):
+        flat = []
+        for count, total, low, high in stats:
+            flat.extend((count, total, low if count else math.nan,
+                         high if count else math.nan))
+        return self.RECORD.pack(bucket, *flat)
+
+    def load(self):
+        row = last_record(self.path, self.RECORD)
+        if row is None:
+            return False
+        stats = []
+        for i in range(len(HISTORY_FIELDS)):
+            count, total, low, high = row[1 + 4 * i:5 + 4 * i]
+            stats.append([count, total, low if count else math.inf,
+                          high if count else -math.inf])
+        self.last = (row[0], stats)
+        return True
+
+    def rebuild(self, rows):
+        """Prepočíta všetky buckety zo surovej histórie a zapíše ich naraz"""
+        buckets = []
+        for row in rows:
+            bucket = self.bucket(row[0], row[7] * 900)
+            if not buckets or bucket > buckets[-1][0]:
+                buckets.append((bucket, self.empty_stats()))
+            self.accumulate(buckets[-1][1], row[1:6])
+
+        with open(self.path, 'wb') as f:
+            for bucket, stats in buckets:
+                f.write(self.pack(bucket, stats))
+        self.last = buckets[-1] if buckets else None
+
+    def add(self, timestamp, offset, values):
+        bucket = self.bucket(timestamp, offset)
+        if self.last is not None and bucket < self.last[0]:
+            return
+        new = self.last is None or bucket > self.last[0]
+        if new:
+            self.last = (bucket, self.empty_stats())
+        self.accumulate(self.last[1], values)
+
+        record = self.pack(*self.last)
+        with open(self.path, 'ab' if new else 'r+b') as f:
+            if not new:
+                f.seek(-len(record), os.SEEK_END)
+            f.write(record)
+
+    def range(self, start, end):
+        """Buckety so začiatkom start <= t < end - O(log n + počet bucketov)"""
+        return read_records(self.path, self.RECORD, start, end)
+
+
+class HistoryStore:
+    """Append-only história pozorovaní (current) v binárnych súboroch
+
+    Každá poloha má vlastný adresár a každý mesiac (UTC) vlastný súbor
+    záznamov pevnej dĺžky zoradených podľa času. Rozsah sa číta cez mmap
+    a bisect nad časmi - bez JSON a bez načítania celého súboru.
+
+    Popri surových záznamoch sa priebežne udržiavajú hodinové a denné
+    agregáty (RollupFile), takže grafy nemusia prechádzať surové dáta.
+    """
+
+    # čas (UTC s), teplota, pocitová, vlhkosť, tlak, vietor, WMO kód,
+    # posun miestneho času v štvrťhodinách
+    RECORD = struct.Struct('<q5fBb2x')
+    FIELDS = HISTORY_FIELDS
+    MISSING_CODE = 255
+    ROLLUPS = {'hour': 3600, 'day': 86400}
+
+    def __init__(self, path=HISTORY_DIR):
+        self.path = path
+        self.lock = threading.Lock()
+        self.last_times = {}
+        self.rollups = {}
+
+    def location_dir(self, latitude, longitude):
+        key = ForecastCache.make_key(latitude, longitude).replace(',', '_')
+        return os.path.join(self.path, key)
+
+    @staticmethod
+    def month_file(timestamp):
+        return time.strftime('%Y-%m.bin', time.gmtime(timestamp))
+
+    @staticmethod
+    def observation_time(snapshot):
+        """Čas current v UTC sekundách (API ho dáva v miestnom čase polohy)"""
+        local = datetime.fromisoformat(snapshot.current.time)
+        offset = snapshot.raw.get('utc_offset_seconds', 0)
+        return int((local - datetime(1970, 1, 1)).total_seconds()) - offset
+
+    def month_files(self, directory):
+        try:
+            return sorted(n for n in os.listdir(directory) if n.endswith('.bin'))
+        except FileNotFoundError:
+            return []
+
+    def last_time(self, directory):
+        for name in reversed(self.month_files(directory)):
+            row = last_record(os.path.join(directory, name), self.RECORD)
+            if row is not None:
+                return row[0]
+        return None
+
+    def rollup(self, directory, resolution):
+        """Agregáty polohy; chýbajúci súbor sa dopočíta zo surovej histórie"""
+        key = directory, resolution
+        rollup = self.rollups.get(key)
+        if rollup is None:
+            rollup = RollupFile(os.path.join(directory, resolution + '.rollup'),
+                                self.ROLLUPS[resolution])
+            if not rollup.load() and self.month_files(directory):
+                rollup.rebuild(self.read_dir(directory, 0))
+            self.rollups[key] = rollup
+        return rollup
+
+    def append(self, latitude, longitude, snapshot):
+        """Zapíše pozorovanie, ak je novšie ako posledné - beží vo fetch workeri"""
+        current = snapshot.current
+        if current is None or not current.time:
+            return False
+
+        timestamp = self.observation_time(snapshot)
+        offset = snapshot.raw.get('utc_offset_seconds', 0)
+        directory = self.location_dir(latitude, longitude)
+        values = [math.nan if v is None else v for v in (
+            current.temperature, current.feels_like, current.humidity,
+            current.pressure, current.wind)]
+        code = current.weather_code
+        if code is None or not 0 <= code < self.MISSING_CODE:
+            code = self.MISSING_CODE
+
+        with self.lock:
+            last = self.last_times.get(directory)
+            if last is None:
+                last = self.last_time(directory)
+            # To isté pozorovanie príde znova z ďalšieho refreshu alebo z cache
+            if last is not None and timestamp <= last:
+                return False
+            try:
+                os.makedirs(directory, exist_ok=True)
+                # Agregáty načítaj (prípadne dopočítaj) ešte pred zápisom
+                rollups = [self.rollup(directory, name) for name in self.ROLLUPS]
+                record = self.RECORD.pack(timestamp, *values, code,
+                                          offset // 900)
+                path = os.path.join(directory, self.month_file(timestamp))
+                with open(path, 'ab') as f:
+                    f.write(record)
+                # Agreguj uložené (float32) hodnoty - rovnako ako pri prepočte
+                stored = self.RECORD.unpack(record)[1:6]
+                for rollup in rollups:
+                    rollup.add(timestamp, offset, stored)
+            except OSError as e:
+                print(f"Error writing history: {e}")
+                return False
+            self.last_times[directory] = timestamp
+        return True
+
+    def read(self, latitude, longitude, start, end):
+        """Surové záznamy v čase start <= t < end ako n-tice v poradí RECORD"""
+        return self.read_dir(self.location_dir(latitude, longitude), start, end)
+
+    def read_dir(self, directory, start, end=None):
+        """Záznamy z mesačných súborov, bez end až po posledný"""
+        first = self.month_file(start)
+        last = self.month_file(end - 1) if end is not None else None
+        if end is None:
+            end = math.inf
+        rows = []
+        for name in self.month_files(directory):
+            if first <= name and (last is None or name <= last):
+                rows.extend(read_records(os.path.join(directory, name),
+                                         self.RECORD, start, end))
+        return rows
+
+    def rollup_range(self, latitude, longitude, resolution, start, end):
+        """Buckety (začiatok, počet, súčet, min, max, ... pre každé pole)"""
+        directory = self.location_dir(latitude, longitude)
+        with self.lock:
+            return self.rollup(directory, resolution).range(start, end)
+
+    def rollup_series(self, latitude, longitude, field, resolution, start,
+                      count, stat='mean'):
+        """count bucketov od start ako séria pre graf (NaN = bez dát)
+
+        stat je 'mean', 'min' alebo 'max'; cena závisí len od počtu bucketov.
+        """
+        width = self.ROLLUPS[resolution]
+        column = 1 + 4 * self.FIELDS.index(field)
+        values = [None] * count
+        for row in self.rollup_range(latitude, longitude, resolution, start,
+                                     start + count * width):
+            samples, total, low, high = row[column:column + 4]
+            if not samples:
+                continue
+            # Denné buckety sa pri zmene letného času posunú o hodinu
+            index = round((row[0] - start) / width)
+            if 0 <= index < count:
+                values[index] = {'mean': total / samples, 'min': low,
+                                 'max': high}[stat]
+        return make_series(values)
+
+
+class TrendGraph:
+    """Čiarový graf na canvase - položky sa vytvoria raz a potom sa len posúvajú
+
+    Voliteľná nameraná história sa kreslí prerušovane naľavo od predpovede,
+    oddelená zvislou čiarou "teraz". visible() povie, či je stránka s grafom
+    navrchu - stránky ležia na sebe, takže winfo_ismapped to nevie.
+    """
+
+    def __init__(self, canvas, color, padding=10, visible=None):
+        self.canvas = canvas
+        self.visible = visible or canvas.winfo_ismapped
+        self.padding = padding
+        self.data = []
+        self.history = []
+        self.min_val = 0
+        self.max_val = 0
+        self.dirty = False
+
+        self.now_line = canvas.create_line(
+            0, 0, 0, 0, fill='#444444', dash=(2, 2), state='hidden')
+        self.history_line = canvas.create_line(
+            0, 0, 0, 0, fill=color, width=1, dash=(4, 2), smooth=True,
+            state='hidden')
+        self.line = canvas.create_line(
+            0, 0, 0, 0, fill=color, width=2, smooth=True, state='hidden')
+        self.max_text = canvas.create_text(
+            0, 0, text="", fill=color, font=('Arial', 8), anchor='nw')
+        self.min_text = canvas.create_text(
+            0, 0, text="", fill=color, font=('Arial', 8), anchor='sw')
+
+        # Prekresli so skutočnou veľkosťou - skrytý až keď sa zobrazí
+        canvas.bind('<Configure>', self.resized)
+
+    def set_data(self, series, min_val, max_val, history=()):
+        self.data = series
+        self.history = history
+        self.min_val = min_val
+        self.max_val = max_val
+        self.dirty = True
+        self.draw()
+
+    def resized(self, event):
+        self.dirty = True
+        self.draw()
+
+    def draw(self):
+        """Aktualizuje súradnice existujúcich položiek, skrytý canvas preskočí"""
+        canvas = self.canvas
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+
+        if not self.visible() or width <= 1 or height <= 1:
+            return
+        self.dirty = False
+        start = time.perf_counter()
+
+        padding = self.padding
+        graph_width = width - 2 * padding
+        graph_height = height - 2 * padding
+        data = self.data
+        min_val, max_val = self.min_val, self.max_val
+
+        # História zaberá ľavú časť podľa pomeru počtu hodín
+        history = self.history
+        split = 0
+        if len(history) > 1 and len(data) > 1:
+            split = graph_width * (len(history) - 1) / (
+                len(history) + len(data) - 2)
+        history_points = series_to_points(
+            history, min_val, max_val, padding, padding, split,
+            graph_height) if split else []
+        self.show_line(self.history_line, history_points)
+        if split:
+            x = padding + split
+            canvas.coords(self.now_line, x, padding, x, height - padding)
+            canvas.itemconfig(self.now_line, state='normal')
+        else:
+            canvas.itemconfig(self.now_line, state='hidden')
+
+        points = series_to_points(data, min_val, max_val, padding + split,
+                                  padding, graph_width - split, graph_height)
+        self.show_line(self.line, points)
+
+        canvas.coords(self.max_text, padding + 5, padding + 5)
+        canvas.coords(self.min_text, padding + 5, height - padding - 5)
+        canvas.itemconfig(self.max_text, text=f"{max_val:.0f}")
+        canvas.itemconfig(self.min_text, text=f"{min_val:.0f}")
+        METRICS.observe('draw_seconds', time.perf_counter() - start,
+                        widget='trend')
+
+    def show_line(self, line, points):
+        if len(points) < 4:
+            self.canvas.itemconfig(line, state='hidden')
+        else:
+            self.canvas.coords(line, points)
+            self.canvas.itemconfig(line, state='normal')
+
+
+class HourlyStrip:
+    """Vodorovný pás hodinovej predpovede s virtualizovaným posúvaním
+
+    Na canvase je len toľko buniek, koľko sa zmestí na obrazovku (+1).
+    Pri ťahaní sa bunky posúvajú a tie, čo vypadnú z okraja, sa recyklujú
+    pre hodinu na druhej strane - počet položiek nezávisí od horizontu.
+    Skrytý pás (visible() je False) sa nekreslí, ostane len dirty.
+    """
+
+    CELL_WIDTH = 64
+
+    def __init__(self, canvas, on_drag_start=None, on_drag_end=None,
+                 visible=None):
+        self.canvas = canvas
+        self.visible = visible or canvas.winfo_ismapped
+        self.on_drag_start = on_drag_start
+        self.on_drag_end = on_drag_end
+        self.cells = ()
+        self.offset = 0
+        self.drag_x = None
+        self.drag_offset = 0
+        self.slots = []
+        self.dirty = False
+
+        canvas.bind('<Configure>', self.resized)
+        canvas.bind('<ButtonPress-1>', self.drag_start)
+        canvas.bind('<B1-Motion>', self.drag_move)
+        canvas.bind('<ButtonRelease-1>', self.drag_end)
+
+    def set_cells(self, cells):
+        self.cells = cells
+        # Nové dáta - všetky sloty treba prepísať
+        for slot in self.slots:
+            slot['index'] = None
+        self.dirty = True
+        self.draw()
+
+    def create_slot(self, number, height):
+        """Jedna bunka: čas, ikona, teplota, zrážky a deliaca čiara"""
+        canvas = self.canvas
+        tag = f"slot{number}"
+        center = self.CELL_WIDTH // 2
+        canvas.create_text(center, 14, text="", fill='lightgray',
+                           font=('Arial', 9), tags=tag)
+        canvas.create_text(center, height * 0.35, text="", fill='white',
+                           font=('Arial', 22), tags=tag)
+        canvas.create_text(center, height * 0.62, text="", fill='white',
+                           font=('Arial', 12, 'bold'), tags=tag)
+        canvas.create_text(center, height * 0.82, text="", fill='cyan',
+                           font=('Arial', 9), tags=tag)
+        canvas.create_line(self.CELL_WIDTH, 6, self.CELL_WIDTH, height - 6,
+                           fill='#333333', tags=tag)
+        canvas.itemconfig(tag, state='hidden')
+        items = canvas.find_withtag(tag)
+        return {'tag': tag, 'items': items[:4], 'x': 0, 'index': None,
+                'shown': False}
+
+    def ensure_slots(self, width, height):
+        """Doplní pool buniek podľa šírky - nikdy ich nemaže"""
+        needed = width // self.CELL_WIDTH + 2
+        while len(self.slots) < needed:
+            self.slots.append(self.create_slot(len(self.slots), height))
+
+    def resized(self, event):
+        self.dirty = True
+        self.draw()
+
+    def max_offset(self, width):
+        return max(0, len(self.cells) * self.CELL_WIDTH - width)
+
+    def draw(self):
+        """Posunie sloty na aktuálny offset, texty mení len recyklovaným"""
+        canvas = self.canvas
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+
+        if not self.visible() or width <= 1 or height <= 1:
+            return
+        self.dirty = False
+        start = time.perf_counter()
+
+        self.ensure_slots(width, height)
+        self.offset = min(max(self.offset, 0), self.max_offset(width))
+
+        # Hodina i je vždy v slote i % pool - pri posune sa mení len okraj
+        pool = len(self.slots)
+        first = self.offset // self.CELL_WIDTH
+        for index in range(first, first + pool):
+            slot = self.slots[index % pool]
+            if index >= len(self.cells):
+                # index sa pri nových dátach maže, viditeľnosť nie
+                if slot['shown']:
+                    canvas.itemconfig(slot['tag'], state='hidden')
+                    slot['shown'] = False
+                slot['index'] = None
+                continue
+
+            if slot['index'] != index:
+                cell = self.cells[index]
+                time_item, icon_item, temp_item, rain_item = slot['items']
+                canvas.itemconfig(time_item, text=cell.time_text)
+                canvas.itemconfig(icon_item, text=cell.icon)
+                canvas.itemconfig(temp_item, text=cell.temp_text)
+                canvas.itemconfig(rain_item, text=cell.rain_text)
+                if not slot['shown']:
+                    canvas.itemconfig(slot['tag'], state='normal')
+                    slot['shown'] = True
+                slot['index'] = index
+
+            x = index * self.CELL_WIDTH - self.offset
+            if slot['x'] != x:
+                canvas.move(slot['tag'], x - slot['x'], 0)
+                slot['x'] = x
+
+        METRICS.observe('draw_seconds', time.perf_counter() - start,
+                        widget='hourly')
+
+    def drag_start(self, event):
+        self.drag_x = event.x
+        self.drag_offset = self.offset
+        if self.on_drag_start:
+            self.on_drag_start()
+
+    def drag_move(self, event):
+        if self.drag_x is None:
+            return
+        self.offset = self.drag_offset - (event.x - self.drag_x)
+        self.draw()
+
+    def drag_end(self, event):
+        self.drag_x = None
+        if self.on_drag_end:
+            self.on_drag_end()
+
+
+def normalize_name(name):
+    """Názov mesta bez diakritiky a veľkých písmen - kľúč pre hľadanie"""
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ''.join(c for c in decomposed
+                   if not unicodedata.combining(c)).lower().strip()
+
+
+class Gazetteer:
+    """Offline index miest - prefixové hľadanie bisectom nad zoradenými kľúčmi"""
+
+    def __init__(self, path=GAZETTEER_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.keys = None
+        self.cities = []
+
+    def load(self):
+        with self.lock:
+            if self.keys is not None:
+                return
+            keys = []
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.startswith('#') or not line.strip():
+                            continue
+                        name, alt_names, country, lat, lon, population = \
+                            line.rstrip('\n').split('\t')
+                        index = len(self.cities)
+                        names = tuple(normalize_name(variant) for variant
+                                      in [name] + alt_names.split(',') if variant)
+                        # names - všetky kľúče mesta, SuggestionCache podľa
+                        # nich zužuje návrhy aj pri alternatívnom názve
+                        self.cities.append({
+                            'name': name,
+                            'country_code': country,
+                            'latitude': float(lat),
+                            'longitude': float(lon),
+                            'population': int(population),
+                            'names': names
+                        })
+                        keys.extend((key, index) for key in names)
+            except OSError as e:
+                print(f"Error loading gazetteer: {e}")
+            keys.sort()
+            self.keys = keys
+
+    def search(self, query, limit=5, exact=False):
+        """Mestá, ktorých názov začína na query - presné zhody a väčšie mestá prvé
+
+        S exact=True vráti len mestá, ktorých názov sa s query zhoduje celý.
+        """
+        self.load()
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+
+        matches = {}
+        i = bisect_left(self.keys, (prefix,))
+        while i < len(self.keys) and self.keys[i][0].startswith(prefix):
+            key, index = self.keys[i]
+            full_match = key == prefix
+            if full_match or not exact:
+                matches[index] = matches.get(index, False) or full_match
+            i += 1
+
+        ranked = sorted(matches, key=lambda index: (
+            not matches[index], -self.cities[index]['population']))
+        return [self.cities[index] for index in ranked[:limit]]
+
+
+class SuggestionCache:
+    """LRU cache prefix -> návrhy miest"""
+
+    def __init__(self, max_entries=64, count=SUGGEST_COUNT):
+        self.max_entries = max_entries
+        self.count = count
+        self.entries = OrderedDict()
+
+    def get(self, prefix):
+        if prefix in self.entries:
+            self.entries.move_to_end(prefix)
+            return self.entries[prefix]
+
+        # Ak kratší prefix vrátil menej ako plný počet, dlhší je jeho podmnožina
+        for length in range(len(prefix) - 1, 0, -1):
+            shorter = self.entries.get(prefix[:length])
+            if shorter is not None and len(shorter) < self.count:
+                return self.narrow(shorter, prefix)
+        return None
+
+    @staticmethod
+    def narrow(results, prefix):
+        """Návrhy, ktoré sedia aj na dlhší prefix, None ak sa to nedá určiť
+
+        Mestá z gazetteera nesú všetky svoje kľúče (names). Výsledok
+        geocodingu mohol sedieť na alternatívny názov, ktorý nepoznáme - ak
+        by vypadol, rozhodne až nový request. Prázdny zoznam je tiež miss.
+        """
+        narrowed = []
+        for result in results:
+            names = result.get('names') or (normalize_name(result['name']),)
+            if any(name.startswith(prefix) for name in names):
+                narrowed.append(result)
+            elif 'names' not in result:
+                return None
+        return narrowed or None
+
+    def put(self, prefix, results):
+        self.entries[prefix] = results
+        self.entries.move_to_end(prefix)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+class LocationStore:
+    """Naposledy zistená poloha na disku - pri štarte netreba ip-api"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, 'location.json')
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                location = json.load(f)
+            return location['latitude'], location['longitude'], location['city']
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading saved location: {e}")
+            return None
+
+    def save(self, latitude, longitude, city):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'latitude': latitude, 'longitude': longitude,
+                           'city': city}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving location: {e}")
+
+
+class StartupProfile:
+    """Časy fáz štartu (--profile-startup), každá fáza sa vypíše raz"""
+
+    def __init__(self, enabled=False, start=STARTUP_TIME):
+        self.enabled = enabled
+        self.start = start
+        self.last = start
+        self.seen = set()
+
+    def mark(self, phase):
+        if not self.enabled or phase in self.seen:
+            return
+        self.seen.add(phase)
+        now = time.perf_counter()
+        print(f"[startup] {phase:<12} +{(now - self.last) * 1000:7.1f} ms"
+              f"  total {(now - self.start) * 1000:7.1f} ms")
+        self.last = now
 
 
 class WeatherApp:
-    def __init__(self, root):
+    def __init__(self, root, profile=None):
         self.root = root
+        self.profile = profile or StartupProfile()
         self.root.title("Weather Display")
 
         # Fullscreen na LCD (480x320)
@@ -33,20 +2063,71 @@ class WeatherApp:
         self.current_page = 0
         self.pages = []
 
+        # Search stránka sa postaví raz a potom sa len prekrýva stránkami
+        self.search_page = None
+        self.search_open = False
+        self.search_generation = 0
+
+        # Našepkávač - debounce timer a poradové číslo poslednej požiadavky
+        self.suggest_timer = None
+        self.suggest_generation = 0
+        self.suggest_future = None
+        self.suggestion_cache = SuggestionCache()
+
         # Hlavný container
         self.main_container = tk.Frame(self.root, bg='black', height=290)
         self.main_container.pack(fill=tk.BOTH, expand=True)
         self.main_container.pack_propagate(False)
 
+        # Sieťové požiadavky bežia na pozadí, aby neblokovali UI
+        self.fetch_worker = FetchWorker(self.root)
+        self.http = HttpClient()
+
+        # Posledné texty labelov - Tk sa volá len pri zmene
+        self.label_texts = {}
+        # Zmeny widgetov sa aplikujú naraz v jednom snímku
+        self.frames = FrameScheduler(self.root)
+
         # Vytvor stránky
+        self.page_names = []
+        self.page_registry = []
+        # TrendGraph/HourlyStrip - po zobrazení stránky sa dokreslia
+        self.canvas_widgets = []
+        self.locations = load_locations()
+        self.site_views = []
         self.create_pages()
+        self.profile.mark('widgets')
+
+        # Sťahuj len dáta, ktoré vytvorené stránky zobrazujú
+        self.forecast_params = build_forecast_params(
+            self.page_names, compact=HAS_OPENMETEO_SDK)
 
         # Načítaj počasie
         self.weather_data = None
         self.forecast_data = None
-
-        # Najprv získaj polohu, potom počasie
-        self.get_location()
+        self.forecast_cache = ForecastCache(
+            max_entries=len(self.locations) + 8)
+        self.location_store = LocationStore()
+        self.history = HistoryStore()
+        # Namerané série pre grafy trendov - číta ich fetch worker
+        self.trend_history = {}
+
+        # Jediný časovač obnovy predpovede - update_weather volá len on
+        self.refresh_scheduler = RefreshScheduler(
+            self.root, self.update_weather, self.show_next_refresh)
+        self.gazetteer = Gazetteer()
+
+        # Lokality z cache zobraz hneď, obnovia sa s hlavnou polohou
+        for view in self.site_views:
+            location = view['location']
+            entry = self.forecast_cache.get(
+                location['latitude'], location['longitude'])
+            if entry is not None:
+                self.on_weather(self.forecast_cache.snapshot(entry), view)
+
+        # Ak poznáme polohu (a predpoveď) z disku, zobraz ich hneď
+        refresh_in = self.warm_start()
+        self.profile.mark('cache')
 
         # Navigačné tlačidlá (na spodku)
         self.create_navigation()
@@ -60,47 +2141,108 @@ class WeatherApp:
         # Spusti auto-rotate
         self.start_auto_rotate()
 
-    def get_location(self):
-        """Automaticky zisti polohu pomocou IP geolokácie"""
-        try:
-            response = requests.get('http://ip-api.com/json/', timeout=10)
-            data = response.json()
+        # Prvé vykreslenie (z cache) ešte pred akoukoľvek sieťovou aktivitou
+        self.root.update_idletasks()
+        self.profile.mark('first paint')
 
-            if data['status'] == 'success':
-                self.LATITUDE = data['lat']
-                self.LONGITUDE = data['lon']
-                self.CITY = f"{data['city']}, {data['countryCode']}"
+        # Sieť a NumPy až potom; bez uloženej polohy ju najprv zisti
+        self.fetch_worker.submit(load_numpy, None)
+        if refresh_in is None:
+            self.get_location()
+        else:
+            self.refresh_scheduler.request(refresh_in)
 
-                print(
-                    f"Location detected: {self.CITY} ({self.LATITUDE}, {self.LONGITUDE})")
+        # Search stránku priprav až po prvom vykreslení
+        self.root.after_idle(self.prepare_search_page)
 
-                # Aktualizuj city label
-                self.city_label.config(text=self.CITY)
+    def prepare_search_page(self):
+        if self.search_page is None:
+            self.create_search_page()
+        self.fetch_worker.submit(self.gazetteer.load, None)
 
-                # Teraz môžeme načítať počasie
-                self.update_weather()
-            else:
-                self.use_fallback_location()
-        except Exception as e:
-            print(f"Error getting location: {e}")
+    def warm_start(self):
+        """Vykreslí uloženú polohu a predpoveď bez čakania na sieť
+
+        Vráti počet sekúnd, o ktoré treba predpoveď obnoviť, alebo None,
+        ak polohu nepoznáme.
+        """
+        location = self.location_store.load()
+        if location is not None:
+            entry = self.forecast_cache.get(location[0], location[1])
+        else:
+            entry = self.forecast_cache.latest()
+            if entry is None:
+                return None
+            location = entry['latitude'], entry['longitude'], entry['city']
+
+        self.LATITUDE, self.LONGITUDE, self.CITY = location
+        self.city_label.config(text=self.CITY)
+        print(f"Using saved location: {self.CITY}")
+
+        if entry is None:
+            return 0
+
+        self.on_weather(self.forecast_cache.snapshot(entry))
+        self.load_trend_history()
+        print(f"Loaded cached forecast for {self.CITY}")
+
+        # Obnov až keď vyprší TTL
+        return self.forecast_cache.ttl - self.forecast_cache.age(entry)
+
+    def get_location(self):
+        """Automaticky zisti polohu pomocou IP geolokácie (na pozadí)"""
+        self.fetch_worker.submit(
+            self.fetch_location, self.on_location,
+            errback=self.on_location_error)
+
+    def fetch_location(self):
+        """Sieťová časť IP geolokácie - beží vo fetch workeri"""
+        return self.http.get_json('geolocation')
+
+    def on_location(self, data):
+        self.profile.mark('location')
+        if data['status'] == 'success':
+            self.set_location(data['lat'], data['lon'],
+                              f"{data['city']}, {data['countryCode']}")
+
+            print(
+                f"Location detected: {self.CITY} ({self.LATITUDE}, {self.LONGITUDE})")
+        else:
             self.use_fallback_location()
 
+    def on_location_error(self, error):
+        print(f"Error getting location: {error}")
+        self.use_fallback_location()
+
     def use_fallback_location(self):
         """Použije predvolenú polohu ak zlyhá automatická detekcia"""
-        self.LATITUDE = 48.9333
-        self.LONGITUDE = 21.9000
-        self.CITY = "Humenné, SK"
+        # Neukladá sa - pri ďalšom štarte sa skúsi znova ip-api
+        self.set_location(48.9333, 21.9000, "Humenné, SK", persist=False)
         print(f"Using fallback location: {self.CITY}")
+
+    def set_location(self, latitude, longitude, city, persist=True):
+        """Prepne aplikáciu na novú polohu a načíta pre ňu počasie"""
+        self.LATITUDE = latitude
+        self.LONGITUDE = longitude
+        self.CITY = city
+
+        # Aktualizuj city label
         self.city_label.config(text=self.CITY)
-        self.update_weather()
+        # História starej polohy do grafov nepatrí
+        self.trend_history = {}
 
-    def manual_location_search(self):
-        """Fullscreen stránka pre vyhľadávanie mesta"""
-        # Zastaviť auto-rotate počas vyhľadávania
-        self.stop_auto_rotate()
+        if persist:
+            self.fetch_worker.submit(
+                self.location_store.save, None, latitude, longitude, city)
 
-        # Vytvor fullscreen search page
+        self.refresh_scheduler.request()
+
+    def create_search_page(self):
+        """Postaví fullscreen stránku pre vyhľadávanie mesta (len raz)"""
         search_page = tk.Frame(self.main_container, bg='black')
+        search_page.place(relx=0, rely=0, relwidth=1, relheight=1)
+        search_page.lower()
+        self.search_page = search_page
 
         # Nadpis
         title = tk.Label(
@@ -110,16 +2252,16 @@ class WeatherApp:
             fg='white',
             bg='black'
         )
-        title.pack(pady=5)
+        title.pack(pady=2)
 
         # Entry field s textom
         entry_frame = tk.Frame(search_page, bg='black')
-        entry_frame.pack(pady=5)
+        entry_frame.pack(pady=2)
 
-        entry_var = tk.StringVar()
+        self.search_entry_var = tk.StringVar()
         entry_display = tk.Label(
             entry_frame,
-            textvariable=entry_var,
+            textvariable=self.search_entry_var,
             font=('Arial', 12),
             width=30,
             height=1,
@@ -131,18 +2273,40 @@ class WeatherApp:
         )
         entry_display.pack()
 
-        result_label = tk.Label(
+        self.search_result_label = tk.Label(
             search_page,
             text="",
             font=('Arial', 9),
             fg='yellow',
             bg='black'
         )
-        result_label.pack(pady=2)
+        self.search_result_label.pack(pady=1)
+
+        # Návrhy miest počas písania - ťuknutím sa mesto vyberie
+        suggestion_frame = tk.Frame(search_page, bg='black')
+        suggestion_frame.pack(pady=1)
+
+        self.suggestion_buttons = []
+        self.suggestions = []
+        for i in range(SUGGEST_COUNT):
+            btn = tk.Button(
+                suggestion_frame,
+                text="",
+                font=('Arial', 8),
+                width=18,
+                height=1,
+                bg='#1a1a1a',
+                fg='white',
+                activebackground='#3a3a3a',
+                relief=tk.FLAT,
+                command=lambda i=i: self.pick_suggestion(i)
+            )
+            btn.pack(side=tk.LEFT, padx=1)
+            self.suggestion_buttons.append(btn)
 
         # Virtuálna klávesnica
         keyboard_frame = tk.Frame(search_page, bg='black')
-        keyboard_frame.pack(pady=5)
+        keyboard_frame.pack(pady=2)
 
         # Rozloženie klávesnice - všetky písmená a číslice
         keyboard_layout = [
@@ -152,17 +2316,6 @@ class WeatherApp:
             ['Z', 'X', 'C', 'V', 'B', 'N', 'M', '-', ',']
         ]
 
-        def key_press(key):
-            current = entry_var.get()
-            if key == '⌫':
-                entry_var.set(current[:-1])
-            elif key == 'SPACE':
-                entry_var.set(current + ' ')
-            elif key == 'CLEAR':
-                entry_var.set('')
-            else:
-                entry_var.set(current + key.lower())
-
         # Vytvor tlačidlá klávesnice
         for row_idx, row in enumerate(keyboard_layout):
             row_frame = tk.Frame(keyboard_frame, bg='black')
@@ -179,7 +2332,7 @@ class WeatherApp:
                     fg='white',
                     activebackground='#3a3a3a',
                     relief=tk.RAISED,
-                    command=lambda k=key: key_press(k)
+                    command=lambda k=key: self.search_key_press(k)
                 )
                 btn.pack(side=tk.LEFT, padx=1, pady=1)
 
@@ -197,7 +2350,7 @@ class WeatherApp:
             fg='white',
             activebackground='#8a3a3a',
             relief=tk.RAISED,
-            command=lambda: key_press('⌫')
+            command=lambda: self.search_key_press('⌫')
         )
         backspace_btn.pack(side=tk.LEFT, padx=1, pady=1)
 
@@ -211,7 +2364,7 @@ class WeatherApp:
             fg='white',
             activebackground='#3a3a3a',
             relief=tk.RAISED,
-            command=lambda: key_press('SPACE')
+            command=lambda: self.search_key_press('SPACE')
         )
         space_btn.pack(side=tk.LEFT, padx=1, pady=1)
 
@@ -225,54 +2378,10 @@ class WeatherApp:
             fg='white',
             activebackground='#8a3a3a',
             relief=tk.RAISED,
-            command=lambda: key_press('CLEAR')
+            command=lambda: self.search_key_press('CLEAR')
         )
         clear_btn.pack(side=tk.LEFT, padx=1, pady=1)
 
-        def search_city():
-            city_name = entry_var.get().strip()
-            if not city_name:
-                result_label.config(text="Please enter a city name", fg='red')
-                return
-
-            result_label.config(text="Searching...", fg='yellow')
-            search_page.update()
-
-            try:
-                url = "https://geocoding-api.open-meteo.com/v1/search"
-                params = {'name': city_name, 'count': 1,
-                          'language': 'en', 'format': 'json'}
-                response = requests.get(url, params=params, timeout=10)
-                data = response.json()
-
-                if 'results' in data and len(data['results']) > 0:
-                    result = data['results'][0]
-                    self.LATITUDE = result['latitude']
-                    self.LONGITUDE = result['longitude']
-
-                    city = result['name']
-                    country = result.get('country', '')
-                    self.CITY = f"{city}, {country}"
-
-                    print(
-                        f"Location set to: {self.CITY} ({self.LATITUDE}, {self.LONGITUDE})")
-
-                    self.city_label.config(text=self.CITY)
-                    self.update_weather()
-
-                    close_search()
-                else:
-                    result_label.config(
-                        text="City not found. Try again.", fg='red')
-            except Exception as e:
-                print(f"Error searching city: {e}")
-                result_label.config(text="Search failed. Try again.", fg='red')
-
-        def close_search():
-            search_page.pack_forget()
-            self.show_page(self.current_page)
-            self.start_auto_rotate()
-
         # Tlačidlá Search a Cancel
         btn_frame = tk.Frame(search_page, bg='black')
         btn_frame.pack(pady=5)
@@ -285,7 +2394,7 @@ class WeatherApp:
             fg='white',
             width=15,
             height=2,
-            command=close_search
+            command=self.close_search
         )
         cancel_btn.pack(side=tk.LEFT, padx=5)
 
@@ -297,14 +2406,186 @@ class WeatherApp:
             fg='white',
             width=15,
             height=2,
-            command=search_city
+            command=self.search_city
         )
         search_btn.pack(side=tk.LEFT, padx=5)
 
-        # Skry aktuálnu stránku a zobraz search
-        for page in self.pages:
-            page.pack_forget()
-        search_page.pack(fill=tk.BOTH, expand=True)
+    def manual_location_search(self):
+        """Zobrazí stránku pre vyhľadávanie mesta"""
+        # Zastaviť auto-rotate a hodiny počas vyhľadávania
+        self.stop_auto_rotate()
+        self.clock.stop()
+
+        if self.search_page is None:
+            self.create_search_page()
+
+        # Vyčisti stav z minulého vyhľadávania
+        self.search_generation += 1
+        self.search_entry_var.set('')
+        self.search_result_label.config(text="", fg='yellow')
+        self.show_suggestions([])
+
+        # Search prekryje aktuálnu stránku
+        self.search_open = True
+        self.frames.call(self.search_page.tkraise)
+
+    def search_key_press(self, key):
+        current = self.search_entry_var.get()
+        if key == '⌫':
+            self.search_entry_var.set(current[:-1])
+        elif key == 'SPACE':
+            self.search_entry_var.set(current + ' ')
+        elif key == 'CLEAR':
+            self.search_entry_var.set('')
+        else:
+            self.search_entry_var.set(current + key.lower())
+
+        self.schedule_suggestions()
+
+    def schedule_suggestions(self):
+        """Debounce - návrhy sa hľadajú až keď sa chvíľu nepíše"""
+        if self.suggest_timer is not None:
+            self.root.after_cancel(self.suggest_timer)
+        self.suggest_timer = self.root.after(
+            SUGGEST_DEBOUNCE_MS, self.update_suggestions)
+
+    def cancel_suggestions(self):
+        """Zruší čakajúci debounce aj rozbehnutú požiadavku"""
+        if self.suggest_timer is not None:
+            self.root.after_cancel(self.suggest_timer)
+            self.suggest_timer = None
+        if self.suggest_future is not None:
+            self.suggest_future.cancel()
+            self.suggest_future = None
+        self.suggest_generation += 1
+
+    def update_suggestions(self):
+        self.suggest_timer = None
+        prefix = normalize_name(self.search_entry_var.get())
+
+        self.cancel_suggestions()
+        if len(prefix) < SUGGEST_MIN_CHARS:
+            self.show_suggestions([])
+            return
+
+        cached = self.suggestion_cache.get(prefix)
+        if cached is not None:
+            self.show_suggestions(cached)
+            return
+
+        # Offline mestá hneď, sieť ich doplní keď odpovie
+        local = self.gazetteer.search(prefix, limit=SUGGEST_COUNT)
+        self.show_suggestions(local)
+
+        generation = self.suggest_generation
+        self.suggest_future = self.fetch_worker.submit(
+            self.geocode_city,
+            lambda data: self.on_suggestions(generation, prefix, local, data),
+            prefix, SUGGEST_COUNT,
+            errback=lambda e: print(f"Error fetching suggestions: {e}"))
+
+    def on_suggestions(self, generation, prefix, local, data):
+        merged = list(local)
+        seen = {(normalize_name(r['name']), r['country_code']) for r in local}
+        for result in data.get('results', []):
+            key = (normalize_name(result['name']), result['country_code'])
+            if key not in seen:
+                seen.add(key)
+                merged.append(result)
+        merged = merged[:SUGGEST_COUNT]
+
+        self.suggestion_cache.put(prefix, merged)
+
+        # Medzitým používateľ písal ďalej - zastaraná odpoveď
+        if generation == self.suggest_generation:
+            self.suggest_future = None
+            self.show_suggestions(merged)
+
+    def show_suggestions(self, results):
+        self.suggestions = results
+        for i, btn in enumerate(self.suggestion_buttons):
+            if i < len(results):
+                result = results[i]
+                text = f"{result['name']}, {result['country_code']}"
+                btn.config(text=text[:24], bg='#2a2a2a')
+            else:
+                btn.config(text="", bg='#1a1a1a')
+
+    def pick_suggestion(self, index):
+        if index < len(self.suggestions):
+            self.cancel_suggestions()
+            self.on_search_result(
+                self.search_generation,
+                {'results': [self.suggestions[index]]})
+
+    def search_city(self):
+        city_name = self.search_entry_var.get().strip()
+        if not city_name:
+            self.search_result_label.config(
+                text="Please enter a city name", fg='red')
+            return
+
+        # Najprv offline zoznam miest, sieť len ak tam mesto nie je
+        results = self.gazetteer.search(city_name, limit=1, exact=True)
+        if results:
+            self.on_search_result(self.search_generation, {'results': results})
+            return
+
+        self.search_result_label.config(text="Searching...", fg='yellow')
+
+        # Výsledok z už zatvorenej stránky ignoruj
+        generation = self.search_generation
+        self.fetch_worker.submit(
+            self.geocode_city,
+            lambda data: self.on_search_result(generation, data),
+            city_name,
+            errback=lambda e: self.on_search_error(generation, e))
+
+    def on_search_result(self, generation, data):
+        if generation != self.search_generation:
+            return
+
+        if 'results' in data and len(data['results']) > 0:
+            result = data['results'][0]
+            self.set_location(result['latitude'], result['longitude'],
+                              f"{result['name']}, {result['country_code']}")
+
+            print(
+                f"Location set to: {self.CITY} ({self.LATITUDE}, {self.LONGITUDE})")
+
+            self.close_search()
+        else:
+            self.search_result_label.config(
+                text="City not found. Try again.", fg='red')
+
+    def on_search_error(self, generation, error):
+        print(f"Error searching city: {error}")
+        if generation == self.search_generation:
+            self.search_result_label.config(
+                text="Search failed. Try again.", fg='red')
+
+    def close_search(self):
+        self.search_generation += 1
+        self.cancel_suggestions()
+        self.search_open = False
+        self.show_page(self.current_page)
+        self.start_auto_rotate()
+
+    def geocode_city(self, city_name, count=1):
+        """Vyhľadá mesto cez geocoding API - beží vo fetch workeri
+
+        Výsledky majú rovnaký tvar ako mestá z gazetteera (ISO country_code).
+        """
+        params = {'name': city_name, 'count': count,
+                  'language': 'en', 'format': 'json'}
+        data = self.http.get_json('geocoding', params)
+        return {'results': [{
+            'name': result['name'],
+            'country_code': (result.get('country_code') or '').upper(),
+            'latitude': result['latitude'],
+            'longitude': result['longitude'],
+            'population': result.get('population') or 0,
+        } for result in data.get('results', [])]}
 
     def start_auto_rotate(self):
         """Spusti automatické prepínanie stránok"""
@@ -325,7 +2606,15 @@ class WeatherApp:
         self.show_page(next_page)
         self.start_auto_rotate()
 
-    def create_combined_weather_page(self, parent):
+    def create_combined_weather_page(self, parent, view):
+        """Aktuálne počasie + 5-dňová predpoveď
+
+        Bez view['location'] je to hlavná stránka (poloha z IP/vyhľadávania,
+        hodiny), s location stránka jednej z nakonfigurovaných lokalít.
+        Widgety sa doplnia do existujúceho view.
+        """
+        location = view['location']
+
         # ===== HORNÁ POLOVICA - Aktuálne počasie =====
         top_half = tk.Frame(parent, bg='black', height=145)
         top_half.pack(fill=tk.X)
@@ -335,23 +2624,23 @@ class WeatherApp:
         header = tk.Frame(top_half, bg='black')
         header.pack(fill=tk.X, pady=2)
 
-        self.city_label = tk.Label(
+        view['city'] = tk.Label(
             header,
-            text="Loading...",
+            text=location['name'] if location else "Loading...",
             font=('Arial', 11, 'bold'),
             fg='white',
             bg='black'
         )
-        self.city_label.pack()
+        view['city'].pack()
 
-        self.current_date_label = tk.Label(
+        view['date'] = tk.Label(
             header,
             text="",
             font=('Arial', 8),
             fg='lightgray',
             bg='black'
         )
-        self.current_date_label.pack()
+        view['date'].pack()
 
         # Hlavné info - teplota a ikona vedľa seba
         main_frame = tk.Frame(top_half, bg='black')
@@ -361,76 +2650,76 @@ class WeatherApp:
         left_side = tk.Frame(main_frame, bg='black')
         left_side.pack(side=tk.LEFT, padx=10)
 
-        self.weather_icon_label = tk.Label(
+        view['icon'] = tk.Label(
             left_side,
             text="",
             font=('Arial', 40),
             fg='white',
             bg='black'
         )
-        self.weather_icon_label.pack()
+        view['icon'].pack()
 
-        self.current_desc_label = tk.Label(
+        view['desc'] = tk.Label(
             left_side,
             text="Loading...",
             font=('Arial', 9),
             fg='lightgray',
             bg='black'
         )
-        self.current_desc_label.pack()
+        view['desc'].pack()
 
         # Pravá strana - teplota a detaily
         right_side = tk.Frame(main_frame, bg='black')
         right_side.pack(side=tk.LEFT, padx=10)
 
-        self.current_temp_label = tk.Label(
+        view['temp'] = tk.Label(
             right_side,
             text="--°",
             font=('Arial', 42, 'bold'),
             fg='white',
             bg='black'
         )
-        self.current_temp_label.pack()
+        view['temp'].pack()
 
         # Detaily v 2 stĺpcoch
         details_grid = tk.Frame(right_side, bg='black')
         details_grid.pack()
 
-        self.current_feels_label = tk.Label(
+        view['feels'] = tk.Label(
             details_grid,
             text="Feels: --°",
             font=('Arial', 7),
             fg='orange',
             bg='black'
         )
-        self.current_feels_label.grid(row=0, column=0, padx=5, sticky='w')
+        view['feels'].grid(row=0, column=0, padx=5, sticky='w')
 
-        self.current_humidity_label = tk.Label(
+        view['humidity'] = tk.Label(
             details_grid,
             text="💧 --%",
             font=('Arial', 7),
             fg='cyan',
             bg='black'
         )
-        self.current_humidity_label.grid(row=0, column=1, padx=5, sticky='w')
+        view['humidity'].grid(row=0, column=1, padx=5, sticky='w')
 
-        self.current_wind_label = tk.Label(
+        view['wind'] = tk.Label(
             details_grid,
             text="💨 --",
             font=('Arial', 7),
             fg='lightblue',
             bg='black'
         )
-        self.current_wind_label.grid(row=1, column=0, padx=5, sticky='w')
+        view['wind'].grid(row=1, column=0, padx=5, sticky='w')
 
-        self.current_pressure_label = tk.Label(
+        view['pressure'] = tk.Label(
             details_grid,
             text="🌡 --",
             font=('Arial', 7),
             fg='yellow',
             bg='black'
         )
-        self.current_pressure_label.grid(row=1, column=1, padx=5, sticky='w')
+        view['pressure'].grid(row=1, column=1, padx=5, sticky='w')
 
         # ===== DOLNÁ POLOVICA - 5-dňová predpoveď =====
         bottom_half = tk.Frame(parent, bg='black', height=145)
@@ -448,13 +2737,13 @@ class WeatherApp:
         forecast_title.pack(pady=2)
 
         # Frame pre predpoveď
-        self.forecast_frame = tk.Frame(bottom_half, bg='black')
-        self.forecast_frame.pack(fill=tk.BOTH, expand=True, padx=3)
+        forecast_frame = tk.Frame(bottom_half, bg='black')
+        forecast_frame.pack(fill=tk.BOTH, expand=True, padx=3)
 
         # Vytvor 5 stĺpcov pre dni
-        self.forecast_labels = []
+        view['forecast'] = []
         for i in range(5):
-            day_frame = tk.Frame(self.forecast_frame,
+            day_frame = tk.Frame(forecast_frame,
                                  bg='#1a1a1a', relief=tk.RAISED, borderwidth=1)
             day_frame.grid(row=0, column=i, padx=1, pady=2, sticky='nsew')
 
@@ -508,7 +2797,7 @@ class WeatherApp:
             )
             rain_label.pack(pady=1)
 
-            self.forecast_labels.append({
+            view['forecast'].append({
                 'day': day_label,
                 'icon': icon_label,
                 'max_temp': max_temp_label,
@@ -518,21 +2807,110 @@ class WeatherApp:
 
         # Nakonfiguruj grid
         for i in range(5):
-            self.forecast_frame.grid_columnconfigure(i, weight=1)
+            forecast_frame.grid_columnconfigure(i, weight=1)
+
+        if location is not None:
+            return view
+
+        # Hlavná stránka - widgety sú dostupné aj ako atribúty aplikácie
+        self.city_label = view['city']
+        self.current_date_label = view['date']
 
-        # Aktualizuj čas
-        self.update_current_time()
+        # Hodiny tikajú len keď je táto stránka zobrazená
+        self.clock_page = parent
+        self.clock = ClockTicker(
+            self.root, self.update_current_time, CLOCK_RESOLUTION)
+        return view
 
     def create_pages(self):
+        """Zaregistruje stránky - widgety vzniknú až pri prvom zobrazení"""
         # Stránka 1: Aktuálne počasie + 5-dňová predpoveď
-        page1 = tk.Frame(self.main_container, bg='black')
-        self.create_combined_weather_page(page1)
-        self.pages.append(page1)
+        self.primary_view = self.create_view(None)
+        self.primary_view['page'] = self.register_page(
+            'combined',
+            lambda parent: self.create_combined_weather_page(
+                parent, self.primary_view),
+            lambda: self.render_view(self.primary_view))
+        # Hlavnú stránku (hodiny, názov mesta) treba hneď
+        self.build_page(self.primary_view['page'])
 
         # Stránka 2: Grafy
-        page2 = tk.Frame(self.main_container, bg='black')
-        self.create_graphs_page(page2)
-        self.pages.append(page2)
+        self.register_page(
+            'trends', self.create_graphs_page,
+            lambda: self.update_graphs(self.weather_data))
+
+        # Stránka 3: Hodinová predpoveď
+        self.register_page(
+            'hourly', self.create_hourly_page,
+            lambda: self.update_hourly(self.weather_data))
+
+        # Ďalšie lokality - každá má vlastnú stránku
+        for location in self.locations:
+            view = self.create_view(location)
+            view['page'] = self.register_page(
+                'site',
+                lambda parent, view=view: self.create_combined_weather_page(
+                    parent, view),
+                lambda view=view: self.render_view(view))
+            self.site_views.append(view)
+
+    def create_view(self, location):
+        """Stav jednej stránky s počasím: data = vykreslené, latest = posledné"""
+        return {'data': None, 'latest': None, 'location': location}
+
+    def register_page(self, name, build, render):
+        """Pridá prázdny frame stránky, build(parent) ho naplní neskôr
+
+        render() prekreslí stránku aktuálnymi dátami - volá sa hneď, ak je
+        stránka vidieť, inak až keď ju show_page zobrazí.
+        """
+        # Stránky ležia na sebe, show_page len vytiahne vybranú navrch
+        page = tk.Frame(self.main_container, bg='black')
+        page.place(relx=0, rely=0, relwidth=1, relheight=1)
+        page.lower()
+        self.pages.append(page)
+        self.page_names.append(name)
+        self.page_registry.append({
+            'build': build, 'render': render, 'built': False, 'dirty': False})
+        return len(self.pages) - 1
+
+    def build_page(self, page_num):
+        entry = self.page_registry[page_num]
+        if not entry['built']:
+            entry['build'](self.pages[page_num])
+            entry['built'] = True
+
+    def page_visible(self, page_num):
+        return (page_num == self.current_page and not self.search_open
+                and self.page_registry[page_num]['built'])
+
+    def visibility(self, parent):
+        """Callback pre canvas widgety - je stránka s parent navrchu?"""
+        page_num = self.pages.index(parent)
+        return lambda: self.page_visible(page_num)
+
+    def draw_stale_widgets(self):
+        """Dokreslí canvasy, ktoré sa zmenili (napr. veľkosť) kým boli skryté"""
+        for widget in self.canvas_widgets:
+            if widget.dirty:
+                widget.draw()
+
+    def mark_dirty(self, page_num):
+        """Viditeľnú stránku prekreslí v najbližšom snímku, skrytú len označí"""
+        self.page_registry[page_num]['dirty'] = True
+        if self.page_visible(page_num):
+            self.frames.call(self.render_dirty, page_num)
+
+    def render_dirty(self, page_num):
+        # Medzitým mohla byť stránka prepnutá preč
+        if self.page_registry[page_num]['dirty'] and self.page_visible(page_num):
+            self.render_page(page_num)
+
+    def render_page(self, page_num):
+        entry = self.page_registry[page_num]
+        entry['dirty'] = False
+        with METRICS.timer('render_seconds', page=self.page_names[page_num]):
+            entry['render']()
 
     def create_current_weather_page(self, parent):
         # Hlavička
@@ -634,9 +3012,6 @@ class WeatherApp:
         )
         self.current_feels_label.pack(side=tk.LEFT, padx=12)
 
-        # Aktualizuj čas
-        self.update_current_time()
-
     def create_forecast_page(self, parent):
         # Nadpis
         title = tk.Label(
@@ -725,7 +3100,7 @@ class WeatherApp:
         # Nadpis
         title = tk.Label(
             parent,
-            text="24h Trends",
+            text=f"{TREND_HOURS}h Trends",
             font=('Arial', 13, 'bold'),
             fg='white',
             bg='black'
@@ -752,6 +3127,10 @@ class WeatherApp:
             height=100
         )
         self.temp_canvas.pack(fill=tk.BOTH, expand=True)
+        visible = self.visibility(parent)
+        self.temp_graph = TrendGraph(self.temp_canvas, '#ff6b6b',
+                                     visible=visible)
+        self.canvas_widgets.append(self.temp_graph)
 
         # Canvas pre graf vlhkosti
         humidity_frame = tk.Frame(parent, bg='black')
@@ -773,6 +3152,34 @@ class WeatherApp:
             height=100
         )
         self.humidity_canvas.pack(fill=tk.BOTH, expand=True)
+        self.humidity_graph = TrendGraph(self.humidity_canvas, 'cyan',
+                                         visible=visible)
+        self.canvas_widgets.append(self.humidity_graph)
+
+    def create_hourly_page(self, parent):
+        title = tk.Label(
+            parent,
+            text=f"Next {HOURLY_STRIP_HOURS} Hours",
+            font=('Arial', 13, 'bold'),
+            fg='white',
+            bg='black'
+        )
+        title.pack(pady=3)
+
+        self.hourly_canvas = tk.Canvas(
+            parent,
+            bg='#1a1a1a',
+            highlightthickness=0
+        )
+        self.hourly_canvas.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+
+        # Počas ťahania nech stránka neodskočí
+        self.hourly_strip = HourlyStrip(
+            self.hourly_canvas,
+            on_drag_start=self.stop_auto_rotate,
+            on_drag_end=self.start_auto_rotate,
+            visible=self.visibility(parent))
+        self.canvas_widgets.append(self.hourly_strip)
 
     def create_navigation(self):
         nav_frame = tk.Frame(self.root, bg='#1a1a1a', height=30)
@@ -840,8 +3247,37 @@ class WeatherApp:
         )
         right_btn.pack(side=tk.RIGHT, padx=5, pady=3)
 
+        # Čas ďalšej obnovy - ťuknutím sa obnoví hneď
+        self.refresh_button = tk.Button(
+            nav_frame,
+            text="↻ --:--",
+            font=('Arial', 9),
+            bg='#1a1a1a',
+            fg='lightgray',
+            activebackground='#3a3a3a',
+            activeforeground='white',
+            relief=tk.FLAT,
+            command=self.refresh_scheduler.refresh_now
+        )
+        self.refresh_button.pack(side=tk.RIGHT, padx=2, pady=3)
+
+    def show_next_refresh(self):
+        """Čas ďalšej obnovy v navigácii, po chybe oranžovo"""
+        scheduler = self.refresh_scheduler
+        if scheduler.running:
+            text = "↻ …"
+        elif scheduler.due is not None:
+            text = "↻ " + datetime.fromtimestamp(scheduler.due).strftime("%H:%M")
+        else:
+            text = "↻ --:--"
+        self.refresh_button.config(
+            text=text, fg='orange' if scheduler.failures else 'lightgray')
+
     def manual_prev_page(self):
         """Manuálne prepnutie na predchádzajúcu stránku"""
+        # Search leží nad stránkami - zatvára ho len jeho vlastné tlačidlo
+        if self.search_open:
+            return
         self.stop_auto_rotate()
         if self.current_page > 0:
             self.show_page(self.current_page - 1)
@@ -851,201 +3287,658 @@ class WeatherApp:
 
     def manual_next_page(self):
         """Manuálne prepnutie na ďalšiu stránku"""
+        if self.search_open:
+            return
         self.stop_auto_rotate()
         next_page = (self.current_page + 1) % len(self.pages)
         self.show_page(next_page)
         self.start_auto_rotate()
 
     def show_page(self, page_num):
-        # Skry všetky stránky
-        for page in self.pages:
-            page.pack_forget()
-
-        # Zobraz vybranú stránku
+        # Vybraná stránka ide navrch v najbližšom snímku
         self.current_page = page_num
-        self.pages[page_num].pack(fill=tk.BOTH, expand=True)
+        self.build_page(page_num)
+        self.frames.call(self.pages[page_num].tkraise)
+
+        # Dáta, ktoré prišli kým bola stránka skrytá
+        if self.page_registry[page_num]['dirty']:
+            self.frames.call(self.render_dirty, page_num)
+        self.frames.call(self.draw_stale_widgets)
+
+        # Hodiny bežia len na stránke, kde sú vidieť
+        if self.pages[page_num] is self.clock_page:
+            self.clock.start()
+        else:
+            self.clock.stop()
 
         # Aktualizuj indikátory
         for i, dot in enumerate(self.page_indicators):
-            if i == page_num:
-                dot.config(fg='white')
-            else:
-                dot.config(fg='gray')
+            self.frames.configure(dot, fg='white' if i == page_num else 'gray')
 
-    def update_current_time(self):
-        now = datetime.now()
-        date_str = now.strftime("%A, %b %d")
-        time_str = now.strftime("%H:%M:%S")
-        self.current_date_label.config(text=f"{date_str}  {time_str}")
-        self.root.after(1000, self.update_current_time)
-
-    def get_weather_icon(self, weather_code):
-        """Vráti textovú ikonu podľa WMO weather code"""
-        icons = {
-            0: "☀",   # Clear sky (slnko)
-            1: "🌤",   # Mainly clear
-            2: "⛅",   # Partly cloudy
-            3: "☁",   # Overcast (oblačno)
-            45: "≡",  # Foggy (hmla)
-            48: "≡",  # Rime fog
-            51: "∴",  # Light drizzle (mrholenie)
-            53: "∴",  # Moderate drizzle
-            55: ":::",  # Dense drizzle
-            61: "🌧",   # Slight rain (dážď)
-            63: "🌧",   # Moderate rain
-            65: "🌧",   # Heavy rain
-            71: "❄",   # Slight snow (sneh)
-            73: "❄",   # Moderate snow
-            75: "❄❄",  # Heavy snow
-            77: "❄",   # Snow grains
-            80: "∴",  # Slight rain showers
-            81: ":::",  # Moderate rain showers
-            82: "⚡",  # Violent rain showers
-            85: "❄",   # Slight snow showers
-            86: "❄❄",  # Heavy snow showers
-            95: "⚡",  # Thunderstorm (búrka)
-            96: "⚡❄",  # Thunderstorm with hail
-            99: "⚡⚡"   # Severe thunderstorm
-        }
-        return icons.get(weather_code, "?")
-
-    def get_weather_description(self, weather_code):
-        """Prevedie WMO weather code na popis"""
-        descriptions = {
-            0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-            45: "Foggy", 48: "Rime fog",
-            51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-            61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-            71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow", 77: "Snow grains",
-            80: "Rain showers", 81: "Moderate showers", 82: "Heavy showers",
-            85: "Snow showers", 86: "Heavy snow showers",
-            95: "Thunderstorm", 96: "Thunderstorm + hail", 99: "Severe thunderstorm"
-        }
-        return descriptions.get(weather_code, "Unknown")
-
-    def get_weather(self):
-        if self.LATITUDE is None or self.LONGITUDE is None:
-            return None
+    def update_current_time(self, now=None):
+        if now is None:
+            now = datetime.now()
+        text = now.strftime(CLOCK_FORMATS[self.clock.resolution])
+        self.set_text(self.current_date_label, text)
 
+    def get_weather_batch(self, coordinates):
+        """Predpoveď pre viac polôh jedným requestom (Open-Meteo berie zoznamy)
+
+        Vráti zoznam WeatherSnapshot v poradí coordinates, pri chybe None.
+        """
         try:
-            url = "https://api.open-meteo.com/v1/forecast"
-            params = {
-                'latitude': self.LATITUDE,
-                'longitude': self.LONGITUDE,
-                'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,weather_code,surface_pressure,wind_speed_10m',
-                'hourly': 'temperature_2m,relative_humidity_2m,precipitation_probability',
-                'daily': 'weather_code,temperature_2m_max,temperature_2m_min,precipitation_probability_max',
-                'timezone': 'auto',
-                'forecast_days': 7
-            }
-
-            response = requests.get(url, params=params, timeout=10)
-            data = response.json()
-
-            if response.status_code == 200:
-                return data
+            results = fetch_forecast(
+                self.http, self.forecast_params, coordinates)
+            # Parsovanie beží tiež mimo Tk vlákna
+            with METRICS.timer('parse_seconds', stage='snapshot'):
+                return [WeatherSnapshot.from_api(data) for data in results]
         except Exception as e:
             print(f"Error fetching weather: {e}")
             return None
 
-    def update_weather(self):
-        data = self.get_weather()
-
-        if data:
-            self.weather_data = data
-            self.update_current_weather(data)
-            self.update_forecast(data)
-            self.update_graphs(data)
-
-        # Aktualizuj každých 10 minút
-        self.root.after(600000, self.update_weather)
-
-    def update_current_weather(self, data):
-        current = data['current']
-
-        temp = round(current['temperature_2m'])
-        feels_like = round(current['apparent_temperature'])
-        humidity = current['relative_humidity_2m']
-        pressure = round(current['surface_pressure'])
-        wind = round(current['wind_speed_10m'], 1)
-        weather_code = current['weather_code']
-
-        self.current_temp_label.config(text=f"{temp}°C")
-        self.weather_icon_label.config(
-            text=self.get_weather_icon(weather_code))
-        self.current_desc_label.config(
-            text=self.get_weather_description(weather_code))
-        self.current_humidity_label.config(text=f"💧 {humidity}%")
-        self.current_wind_label.config(text=f"💨 {wind} km/h")
-        self.current_pressure_label.config(text=f"🌡 {pressure} hPa")
-        self.current_feels_label.config(text=f"Feels: {feels_like}°C")
-
-    def update_forecast(self, data):
-        daily = data['daily']
-
-        for i in range(5):
-            if i < len(daily['time']):
-                date = datetime.fromisoformat(daily['time'][i])
-                day_name = date.strftime("%a")
-
-                weather_code = daily['weather_code'][i]
-                max_temp = round(daily['temperature_2m_max'][i])
-                min_temp = round(daily['temperature_2m_min'][i])
-                rain_prob = daily['precipitation_probability_max'][i]
-
-                labels = self.forecast_labels[i]
-                labels['day'].config(text=day_name)
-                labels['icon'].config(text=self.get_weather_icon(weather_code))
-                labels['max_temp'].config(text=f"{max_temp}°")
-                labels['min_temp'].config(text=f"{min_temp}°")
-                labels['rain'].config(text=f"💧 {rain_prob}%")
-
-    def update_graphs(self, data):
-        hourly = data['hourly']
-
-        temps = hourly['temperature_2m'][:24]
-        humidity = hourly['relative_humidity_2m'][:24]
-
-        self.draw_graph(self.temp_canvas, temps, '#ff6b6b',
-                        min(temps) - 2, max(temps) + 2)
-        self.draw_graph(self.humidity_canvas, humidity, 'cyan', 0, 100)
-
-    def draw_graph(self, canvas, data, color, min_val, max_val):
-        canvas.delete('all')
+    def update_weather(self, force=False):
+        """Jedna obnova - spúšťa ju refresh_scheduler, inak request()
+
+        S force sa sťahujú aj polohy s čerstvou predpoveďou v cache.
+        """
+        # Hlavná poloha + nakonfigurované lokality
+        targets = []
+        if self.LATITUDE is not None and self.LONGITUDE is not None:
+            targets.append((self.LATITUDE, self.LONGITUDE, self.CITY,
+                            self.primary_view))
+        for view in self.site_views:
+            location = view['location']
+            targets.append((location['latitude'], location['longitude'],
+                            location['name'], view))
+
+        stale = []
+        fresh = []
+        for target in targets:
+            entry = self.forecast_cache.get(target[0], target[1])
+            if not force and self.forecast_cache.is_fresh(entry):
+                # Predpoveď pre túto polohu je ešte čerstvá, sieť netreba
+                snapshot = self.forecast_cache.snapshot(entry)
+                self.on_weather(snapshot, target[3])
+                if target[3] is self.primary_view:
+                    self.load_trend_history()
+                fresh.append(snapshot)
+            else:
+                stale.append(target)
+
+        # Všetky zastarané polohy jedným requestom
+        if stale:
+            self.fetch_worker.submit(
+                self.get_weather_batch,
+                lambda results: self.on_weather_batch(stale, results, fresh),
+                [(lat, lon) for lat, lon, city, view in stale])
+        else:
+            self.refresh_scheduler.done(True, fresh)
 
-        width = canvas.winfo_width()
-        height = canvas.winfo_height()
+    def on_weather_batch(self, targets, results, fresh=()):
+        self.profile.mark('first fetch')
+        self.refresh_scheduler.done(
+            results is not None, list(fresh) + list(results or ()))
+        if not results:
+            return
 
-        if width <= 1:
-            width = 450
-        if height <= 1:
-            height = 100
+        # Cache sa zapíše raz za celú dávku, nie raz za polohu
+        stored = [(latitude, longitude, city, snapshot,
+                   view is self.primary_view)
+                  for (latitude, longitude, city, view), snapshot
+                  in zip(targets, results) if snapshot]
+        if stored:
+            self.fetch_worker.submit(
+                self.forecast_cache.store_many, None, stored)
+
+        for (latitude, longitude, city, view), snapshot in zip(targets, results):
+            self.on_weather_fetched(latitude, longitude, city, snapshot, view)
+
+    def on_weather_fetched(self, latitude, longitude, city, snapshot, view=None):
+        view = view or self.primary_view
+        primary = view is self.primary_view
+        if snapshot:
+            # Zápis a čítanie histórie v jednej úlohe - graf uvidí aj toto meranie
+            self.fetch_worker.submit(
+                self.record_history, self.on_trend_history,
+                latitude, longitude, snapshot, primary)
+
+        # Odpoveď pre starú polohu (medzitým sa zmenilo mesto) nezobrazuj
+        if not primary or (latitude, longitude) == (self.LATITUDE, self.LONGITUDE):
+            self.on_weather(snapshot, view)
+
+    def record_history(self, latitude, longitude, snapshot, primary):
+        """Zapíše pozorovanie, pre hlavnú polohu vráti históriu pre grafy
+
+        Beží vo fetch workeri - zámok histórie ani prípadný rebuild agregátov
+        neblokujú Tk vlákno.
+        """
+        self.history.append(latitude, longitude, snapshot)
+        if primary:
+            return self.read_trend_history(latitude, longitude)
+        return None
+
+    def read_trend_history(self, latitude, longitude):
+        """Namerané hodinové priemery pred predpoveďou - beží vo fetch workeri"""
+        now = int(time.time())
+        start = now - now % 3600 - HISTORY_HOURS * 3600
+        series = {field: self.history.rollup_series(
+                      latitude, longitude, field, 'hour', start, HISTORY_HOURS)
+                  for field in ('temperature', 'humidity')}
+        return latitude, longitude, series
+
+    def load_trend_history(self):
+        """História pre grafy bez nového merania (predpoveď z cache)"""
+        if HISTORY_HOURS and self.LATITUDE is not None:
+            self.fetch_worker.submit(
+                self.read_trend_history, self.on_trend_history,
+                self.LATITUDE, self.LONGITUDE)
+
+    def on_trend_history(self, result):
+        if result is None or not HISTORY_HOURS:
+            return
+        latitude, longitude, series = result
+        # Medzitým sa zmenilo mesto
+        if (latitude, longitude) != (self.LATITUDE, self.LONGITUDE):
+            return
+        self.trend_history = series
+        if self.weather_data is not None:
+            self.mark_dirty(self.page_names.index('trends'))
 
-        padding = 10
-        graph_width = width - 2 * padding
-        graph_height = height - 2 * padding
+    def on_weather(self, snapshot, view=None):
+        """Prevezme predpoveď v Tk vlákne a prekreslí len zmenené časti"""
+        if not snapshot:
+            return
 
-        if len(data) < 2:
+        view = view or self.primary_view
+        view['latest'] = snapshot
+        self.mark_dirty(view['page'])
+
+        # Grafy a hodinový pás sú len pre hlavnú polohu
+        if view is self.primary_view:
+            previous = self.weather_data
+            self.weather_data = snapshot
+            if snapshot.hourly and snapshot.changed(previous, 'hourly'):
+                for page_num, name in enumerate(self.page_names):
+                    if name in ('trends', 'hourly'):
+                        self.mark_dirty(page_num)
+
+    def render_view(self, view):
+        """Prekreslí stránku s počasím - len časti zmenené od minula"""
+        snapshot = view['latest']
+        previous = view['data']
+        view['data'] = snapshot
+
+        if snapshot.current and snapshot.changed(previous, 'current'):
+            self.update_current_weather(snapshot, view)
+        if snapshot.changed(previous, 'daily'):
+            self.update_forecast(snapshot, view)
+
+    def set_text(self, label, text):
+        """Zmenený text labelu sa nastaví v najbližšom snímku"""
+        if self.label_texts.get(label) != text:
+            self.frames.configure(label, text=text)
+            self.label_texts[label] = text
+
+    def update_current_weather(self, snapshot, view=None):
+        view = view or self.primary_view
+        current = snapshot.current
+
+        self.set_text(view['temp'], current.temp_text)
+        self.set_text(view['icon'], current.icon)
+        self.set_text(view['desc'], current.description)
+        self.set_text(view['humidity'], current.humidity_text)
+        self.set_text(view['wind'], current.wind_text)
+        self.set_text(view['pressure'], current.pressure_text)
+        self.set_text(view['feels'], current.feels_text)
+
+        # Lokality nemajú hodiny - ukáž miestny čas merania
+        if view is not self.primary_view and current.time:
+            self.set_text(view['date'], f"Updated {current.time[11:16]}")
+
+    def update_forecast(self, snapshot, view=None):
+        view = view or self.primary_view
+
+        for day, labels in zip(snapshot.daily, view['forecast']):
+            self.set_text(labels['day'], day.day_name)
+            self.set_text(labels['icon'], day.icon)
+            self.set_text(labels['max_temp'], day.max_text)
+            self.set_text(labels['min_temp'], day.min_text)
+            self.set_text(labels['rain'], day.rain_text)
+
+    def update_graphs(self, snapshot):
+        hourly = snapshot.hourly
+
+        temps = hourly.temperature[:TREND_HOURS]
+        humidity = hourly.humidity[:TREND_HOURS]
+
+        # Namerané hodinové priemery - načítal ich fetch worker
+        temp_history = self.trend_history.get('temperature', ())
+        humidity_history = self.trend_history.get('humidity', ())
+
+        low, high = hourly.temperature_bounds
+        if low is None:
             return
+        history_low, history_high = series_bounds(temp_history)
+        if history_low is not None:
+            low, high = min(low, history_low), max(high, history_high)
+        self.temp_graph.set_data(temps, low - 2, high + 2, temp_history)
+        self.humidity_graph.set_data(humidity, 0, 100, humidity_history)
+
+    def update_hourly(self, snapshot):
+        self.hourly_strip.set_cells(snapshot.hourly.cells)
+
+
+class HeadlessRenderer:
+    """Kreslí stránky priamo do PIL obrázka - bez Tk a X servera
+
+    Rozloženie zodpovedá Tk stránkam, aby sa dali použiť na framebuffer/SPI
+    displejoch aj ako screenshoty.
+    """
+
+    WIDTH = 480
+    HEIGHT = 320
+    NAV_HEIGHT = 30
+
+    # Tk fonty sú v bodoch, PIL v pixeloch (Tk scaling ~1.33 pri 96 dpi)
+    PT_TO_PX = 1.33
+
+    def __init__(self, font_path=HEADLESS_FONT, bold_font_path=HEADLESS_BOLD_FONT,
+                 symbol_font_paths=HEADLESS_SYMBOL_FONTS):
+        self.font_paths = {False: font_path, True: bold_font_path}
+        self.fonts = {}
+        self.symbol_font_path = next(
+            (path for path in symbol_font_paths if os.path.exists(path)), None)
+        self.symbol_fonts = {}
+        # font -> maska .notdef glyfu a (font, znak) -> má font znak?
+        self.missing_masks = {}
+        self.glyphs = {}
+
+    def font(self, size, bold=False):
+        key = (size, bold)
+        if key not in self.fonts:
+            px = round(size * self.PT_TO_PX)
+            try:
+                self.fonts[key] = ImageFont.truetype(self.font_paths[bold], px)
+            except OSError:
+                self.fonts[key] = ImageFont.load_default()
+        return self.fonts[key]
 
-        points = []
-        for i, value in enumerate(data):
-            x = padding + (i / (len(data) - 1)) * graph_width
-            normalized = (value - min_val) / (max_val -
-                                              min_val) if max_val != min_val else 0.5
-            y = height - padding - (normalized * graph_height)
-            points.extend([x, y])
+    def symbol_font(self, size):
+        if self.symbol_font_path is None:
+            return None
+        if size not in self.symbol_fonts:
+            px = round(size * self.PT_TO_PX)
+            try:
+                self.symbol_fonts[size] = ImageFont.truetype(
+                    self.symbol_font_path, px)
+            except OSError:
+                self.symbol_fonts[size] = None
+        return self.symbol_fonts[size]
+
+    def has_glyph(self, font, char):
+        """Chýbajúci znak PIL nakreslí ako .notdef - porovná sa jeho maska"""
+        if char.isascii():
+            return True
+        key = id(font), char
+        if key not in self.glyphs:
+            missing = self.missing_masks.get(id(font))
+            if missing is None:
+                missing = bytes(font.getmask('\U0010fffd'))
+                self.missing_masks[id(font)] = missing
+            self.glyphs[key] = bytes(font.getmask(char)) != missing
+        return self.glyphs[key]
+
+    def runs(self, text, size, bold):
+        """Úseky textu podľa fontu, ktorý ich znaky má"""
+        font = self.font(size, bold)
+        symbol = self.symbol_font(size)
+        runs = []
+        for char in text:
+            char_font = font
+            if not self.has_glyph(font, char):
+                if symbol is not None and self.has_glyph(symbol, char):
+                    char_font = symbol
+                else:
+                    char = HEADLESS_GLYPH_SUBSTITUTES.get(char, char)
+            if runs and runs[-1][1] is char_font:
+                runs[-1][0] += char
+            else:
+                runs.append([char, char_font])
+        # Vynechaný symbol na začiatku nenechá medzeru
+        if runs and runs[0][1] is font:
+            runs[0][0] = runs[0][0].lstrip()
+        return [run for run in runs if run[0]]
+
+    def text(self, draw, x, y, text, size, fill, bold=False, align='center'):
+        """Text s horným okrajom na y, zarovnaný na x podľa align"""
+        runs = self.runs(text, size, bold)
+        if len(runs) > 1:
+            return self.mixed_text(draw, x, y, runs, fill, align)
+        font = runs[0][1] if runs else self.font(size, bold)
+        text = runs[0][0] if runs else ''
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        width = right - left
+        if align == 'center':
+            x -= width / 2
+        elif align == 'right':
+            x -= width
+        draw.text((x - left, y - top), text, fill=fill, font=font)
+        return bottom - top
+
+    def mixed_text(self, draw, x, y, runs, fill, align):
+        """Text z viacerých fontov na spoločnej základnej čiare"""
+        boxes = [draw.textbbox((0, 0), text, font=font, anchor='ls')
+                 for text, font in runs]
+        top = min(box[1] for box in boxes)
+        bottom = max(box[3] for box in boxes)
+        width = sum(font.getlength(text) for text, font in runs)
+        if align == 'center':
+            x -= width / 2
+        elif align == 'right':
+            x -= width
+        for text, font in runs:
+            draw.text((x, y - top), text, fill=fill, font=font, anchor='ls')
+            x += font.getlength(text)
+        return bottom - top
+
+    def new_page(self, page_num, page_count):
+        image = Image.new('RGB', (self.WIDTH, self.HEIGHT), 'black')
+        draw = ImageDraw.Draw(image)
+
+        # Spodná lišta s indikátormi stránok
+        nav_top = self.HEIGHT - self.NAV_HEIGHT
+        draw.rectangle((0, nav_top, self.WIDTH, self.HEIGHT), fill='#1a1a1a')
+        spacing = 16
+        start = self.WIDTH / 2 - (page_count - 1) * spacing / 2
+        for i in range(page_count):
+            cx = start + i * spacing
+            cy = nav_top + self.NAV_HEIGHT / 2
+            color = 'white' if i == page_num else 'gray'
+            draw.ellipse((cx - 4, cy - 4, cx + 4, cy + 4), fill=color)
+        return image, draw
+
+    def render_combined(self, snapshot, city, now=None, page_num=0, page_count=2):
+        now = now or datetime.now()
+        image, draw = self.new_page(page_num, page_count)
+        cx = self.WIDTH / 2
 
+        # Hlavička
+        y = 3
+        y += self.text(draw, cx, y, city, 11, 'white', bold=True) + 3
+        self.text(draw, cx, y, now.strftime(CLOCK_FORMATS[CLOCK_RESOLUTION]),
+                  8, 'lightgray')
+
+        # Ikona + popis vľavo, teplota + detaily vpravo
+        current = snapshot.current
+        self.text(draw, 140, 40, current.icon, 40, 'white')
+        self.text(draw, 140, 112, current.description, 9, 'lightgray')
+
+        self.text(draw, 300, 38, current.temp_text, 42, 'white', bold=True)
+        details = (
+            (current.feels_text, 'orange'),
+            (current.humidity_text, 'cyan'),
+            (current.wind_text, 'lightblue'),
+            (current.pressure_text, 'yellow'),
+        )
+        for i, (text, color) in enumerate(details):
+            x = 240 + (i % 2) * 70
+            row_y = 108 + (i // 2) * 14
+            self.text(draw, x, row_y, text, 7, color, align='left')
+
+        # 5-dňová predpoveď
+        top = 145
+        self.text(draw, cx, top + 2, "5-Day Forecast", 10, 'white', bold=True)
+        column_width = (self.WIDTH - 6) / 5
+        box_top = top + 22
+        box_bottom = self.HEIGHT - self.NAV_HEIGHT - 2
+        for i, day in enumerate(snapshot.daily[:5]):
+            left = 3 + i * column_width
+            draw.rectangle((left + 1, box_top, left + column_width - 1, box_bottom),
+                           fill='#1a1a1a', outline='#333333')
+            col_x = left + column_width / 2
+            y = box_top + 3
+            y += self.text(draw, col_x, y, day.day_name, 8, 'white', bold=True) + 4
+            y += self.text(draw, col_x, y, day.icon, 20, 'white') + 4
+            y += self.text(draw, col_x, y, day.max_text,
+                           10, '#ff6b6b', bold=True) + 3
+            y += self.text(draw, col_x, y, day.min_text, 8, '#4dabf7') + 3
+            self.text(draw, col_x, y, day.rain_text, 7, 'cyan')
+        return image
+
+    def render_trends(self, snapshot, page_num=1, page_count=2):
+        image, draw = self.new_page(page_num, page_count)
+        self.text(draw, self.WIDTH / 2, 4, f"{TREND_HOURS}h Trends",
+                  13, 'white', bold=True)
+
+        hourly = snapshot.hourly
+        temps = hourly.temperature[:TREND_HOURS]
+        humidity = hourly.humidity[:TREND_HOURS]
+        low, high = hourly.temperature_bounds
+
+        graphs = [("Humidity", 'cyan', humidity, 0, 100)]
+        if low is not None:
+            graphs.insert(0, ("Temperature", '#ff6b6b', temps, low - 2, high + 2))
+
+        area_top = 30
+        area_height = (self.HEIGHT - self.NAV_HEIGHT - area_top) / 2
+        for i, (title, color, series, min_val, max_val) in enumerate(graphs):
+            top = area_top + i * area_height
+            self.text(draw, self.WIDTH / 2, top, title, 10, color, bold=True)
+            box = (15, top + 18, self.WIDTH - 15, top + area_height - 3)
+            draw.rectangle(box, fill='#1a1a1a')
+            self.draw_graph(draw, box, series, color, min_val, max_val)
+        return image
+
+    def draw_graph(self, draw, box, series, color, min_val, max_val, padding=10):
+        left, top, right, bottom = box
+        points = series_to_points(
+            series, min_val, max_val, left + padding, top + padding,
+            right - left - 2 * padding, bottom - top - 2 * padding)
         if len(points) >= 4:
-            canvas.create_line(points, fill=color, width=2, smooth=True)
+            draw.line(points, fill=color, width=2, joint='curve')
+        self.text(draw, left + padding + 5, top + padding + 5,
+                  f"{max_val:.0f}", 8, color, align='left')
+        height = self.text(draw, -100, 0, f"{min_val:.0f}", 8, color)
+        self.text(draw, left + padding + 5, bottom - padding - 5 - height,
+                  f"{min_val:.0f}", 8, color, align='left')
+
+    def render_pages(self, snapshot, city, now=None):
+        return [self.render_combined(snapshot, city, now, 0, 2),
+                self.render_trends(snapshot, 1, 2)]
+
+
+def framebuffer_geometry(device):
+    """Šírka, výška, bpp a dĺžka riadku v bajtoch zo /sys/class/graphics
+
+    Bez sysfs sa predpokladá 16 bpp displej s rozmermi headless stránky.
+    """
+    sysfs = os.path.join('/sys/class/graphics', os.path.basename(device))
+
+    def read(name):
+        with open(os.path.join(sysfs, name)) as f:
+            return f.read().strip()
+
+    try:
+        bpp = int(read('bits_per_pixel'))
+    except (OSError, ValueError):
+        bpp = 16
+    try:
+        width, height = (int(v) for v in read('virtual_size').split(','))
+    except (OSError, ValueError):
+        width, height = HeadlessRenderer.WIDTH, HeadlessRenderer.HEIGHT
+    try:
+        stride = int(read('stride'))
+    except (OSError, ValueError):
+        stride = 0
+    return width, height, bpp, max(stride, width * bpp // 8)
+
+
+def rgb565_bytes(image):
+    """RGB565 little-endian - Pillow na to packer nemá"""
+    if np is not None:
+        pixels = np.asarray(image, dtype=np.uint16)
+        packed = ((pixels[..., 0] >> 3) << 11 | (pixels[..., 1] >> 2) << 5
+                  | pixels[..., 2] >> 3)
+        return packed.astype('<u2').tobytes()
+
+    data = image.tobytes()
+    packed = [(r >> 3) << 11 | (g >> 2) << 5 | b >> 3
+              for r, g, b in zip(data[0::3], data[1::3], data[2::3])]
+    return struct.pack(f'<{len(packed)}H', *packed)
+
+
+def write_framebuffer(image, device):
+    """Zapíše obrázok do /dev/fbN v jeho rozmere a farebnej hĺbke (16/32 bpp)
+
+    Stránka sa položí do ľavého horného rohu, riadky sa doplnia na stride.
+    """
+    width, height, bpp, stride = framebuffer_geometry(device)
+    frame = Image.new('RGB', (width, height), 'black')
+    frame.paste(image.convert('RGB'), (0, 0))
+
+    if bpp == 16:
+        raw = rgb565_bytes(frame)
+    else:
+        raw = frame.convert('RGBA').tobytes('raw', 'BGRA')
+
+    row = width * bpp // 8
+    if stride > row:
+        padding = bytes(stride - row)
+        raw = b''.join(raw[i:i + row] + padding
+                       for i in range(0, len(raw), row))
+    with open(device, 'wb') as fb:
+        fb.write(raw)
+
+
+def resolve_location(http, location_store, forecast_cache):
+    """Poloha pre headless režim: uložená, z cache, z IP, alebo predvolená"""
+    location = location_store.load()
+    if location is not None:
+        return location
+
+    entry = forecast_cache.latest()
+    if entry is not None:
+        return entry['latitude'], entry['longitude'], entry['city']
+
+    try:
+        data = http.get_json('geolocation')
+        if data['status'] == 'success':
+            location = (data['lat'], data['lon'],
+                        f"{data['city']}, {data['countryCode']}")
+            location_store.save(*location)
+            return location
+    except Exception as e:
+        print(f"Error getting location: {e}")
+    return 48.9333, 21.9000, "Humenné, SK"
+
+
+def run_headless(output=None, framebuffer=None, interval=10):
+    """Headless režim - stránky sa kreslia cez PIL do PNG alebo framebuffera"""
+    if not load_pillow():
+        raise SystemExit("Headless mode needs Pillow (pip install pillow)")
+    load_numpy()
+
+    http = HttpClient()
+    forecast_cache = ForecastCache()
+    latitude, longitude, city = resolve_location(
+        http, LocationStore(), forecast_cache)
+    params = build_forecast_params(
+        ['combined', 'trends'], compact=HAS_OPENMETEO_SDK)
+    renderer = HeadlessRenderer()
+
+    def current_data():
+        """Vráti (snapshot alebo None, či sa podarilo)"""
+        entry = forecast_cache.get(latitude, longitude)
+        if forecast_cache.is_fresh(entry):
+            return forecast_cache.snapshot(entry), True
+        try:
+            data = fetch_forecast(http, params, [(latitude, longitude)])[0]
+            snapshot = WeatherSnapshot.from_api(data)
+            forecast_cache.store(latitude, longitude, city, snapshot)
+            return snapshot, True
+        except Exception as e:
+            print(f"Error fetching weather: {e}")
+            return (forecast_cache.snapshot(entry) if entry else None), False
+
+    try:
+        if framebuffer is None:
+            data = current_data()[0]
+            if data is None:
+                raise SystemExit("No forecast available")
+            output = output or 'weather.png'
+            base, ext = os.path.splitext(output)
+            for i, image in enumerate(renderer.render_pages(data, city), 1):
+                path = f"{base}-{i}{ext or '.png'}"
+                image.save(path)
+                print(f"Wrote {path}")
+            return
 
-        canvas.create_text(padding + 5, padding + 5,
-                           text=f"{max_val:.0f}", fill=color, font=('Arial', 8), anchor='nw')
-        canvas.create_text(padding + 5, height - padding - 5,
-                           text=f"{min_val:.0f}", fill=color, font=('Arial', 8), anchor='sw')
+        # Framebuffer - striedaj stránky ako Tk auto-rotate, obnova dát
+        # sa plánuje rovnako ako v Tk (backoff, volatilita, beh modelu)
+        page = 0
+        data = None
+        failures = 0
+        due = 0
+        while True:
+            if time.time() >= due:
+                snapshot, success = current_data()
+                if snapshot is not None:
+                    data = snapshot
+                failures = 0 if success else failures + 1
+                volatile = success and forecast_volatile(data)
+                due = time.time() + refresh_delay(failures, volatile)
+            if data is not None:
+                if page == 0:
+                    image = renderer.render_combined(data, city)
+                else:
+                    image = renderer.render_trends(data)
+                write_framebuffer(image, framebuffer)
+            page = (page + 1) % 2
+            time.sleep(interval)
+    finally:
+        http.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Weather display for a 480x320 LCD")
+    parser.add_argument('--headless', action='store_true',
+                        help="render without Tk (PNG files or framebuffer)")
+    parser.add_argument('--output', metavar='PATH',
+                        help="headless: PNG path, page number is appended")
+    parser.add_argument('--framebuffer', metavar='DEVICE',
+                        help="headless: draw to a framebuffer, e.g. /dev/fb1")
+    parser.add_argument('--interval', type=float, default=10,
+                        help="headless framebuffer page rotation in seconds")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help="print time spent in each startup phase")
+    parser.add_argument('--metrics-port', type=int, metavar='PORT',
+                        help="serve Prometheus metrics on /metrics")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="address for the metrics endpoint")
+    args = parser.parse_args()
+
+    if args.metrics_port:
+        start_metrics_server(METRICS, args.metrics_port, args.metrics_host)
+
+    if args.headless:
+        run_headless(args.output, args.framebuffer, args.interval)
+        return
+
+    profile = StartupProfile(args.profile_startup)
+    profile.mark('imports')
+    root = tk.Tk()
+    profile.mark('tk init')
+    app = WeatherApp(root, profile)
+    if args.metrics_port:
+        LoopProbe(root, METRICS).start()
+    try:
+        root.mainloop()
+    finally:
+        app.refresh_scheduler.cancel()
+        app.frames.cancel()
+        app.fetch_worker.shutdown()
+        app.http.close()
 
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = WeatherApp(root)
-    root.mainloop()
+    main()